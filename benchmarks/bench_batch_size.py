@@ -0,0 +1,74 @@
+#!/usr/bin/env python3
+"""
+批量推理基准：统计不同批大小下 CPU 推理吞吐（帧/秒）
+用法：python benchmarks/bench_batch_size.py [--video 路径] [--batch-sizes 1,2,4,8] [--frames 64]
+未指定视频时使用随机合成的 1280x720 帧
+"""
+import os
+import sys
+import time
+import argparse
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import cv2
+from core.config import Config
+from core.model_loader import load_mtdetr
+
+def load_frames(video_path, num_frames):
+    """读取测试帧：指定视频时取前N帧，否则生成随机帧"""
+    if not video_path:
+        rng = np.random.default_rng(0)
+        return [rng.integers(0, 256, (720, 1280, 3), dtype=np.uint8) for _ in range(num_frames)]
+
+    cap = cv2.VideoCapture(video_path)
+    frames = []
+    while len(frames) < num_frames:
+        ret, frame = cap.read()
+        if not ret:
+            break
+        frames.append(frame)
+    cap.release()
+    return frames
+
+def run_batch(model, frames, batch_size, device):
+    """按指定批大小跑完全部帧，返回耗时（秒）"""
+    start = time.perf_counter()
+    for i in range(0, len(frames), batch_size):
+        model.predict(
+            source=frames[i:i + batch_size],
+            save=False,
+            device=device,
+            imgsz=Config.IMGSZ,
+            conf=Config.CONF_THRESHOLD,
+            mask_threshold=[0.4, 0.9],
+            verbose=False
+        )
+    return time.perf_counter() - start
+
+def main():
+    parser = argparse.ArgumentParser(description="MTDETR 批量推理吞吐基准")
+    parser.add_argument("--video", default="", help="测试视频路径（默认随机帧）")
+    parser.add_argument("--batch-sizes", default="1,2,4,8", help="逗号分隔的批大小列表")
+    parser.add_argument("--frames", type=int, default=64, help="每个批大小处理的帧数")
+    parser.add_argument("--device", default="cpu", help="推理设备")
+    args = parser.parse_args()
+
+    frames = load_frames(args.video, args.frames)
+    if not frames:
+        print(f"❌ 无可用测试帧：{args.video}")
+        return 1
+
+    model = load_mtdetr()
+    # 预热：首批推理包含模型初始化开销，不计入统计
+    run_batch(model, frames[:1], 1, args.device)
+
+    print(f"{'batch':>6} {'frames':>7} {'seconds':>9} {'fps':>8}")
+    for batch_size in [int(x) for x in args.batch_sizes.split(",") if x.strip()]:
+        elapsed = run_batch(model, frames, batch_size, args.device)
+        print(f"{batch_size:>6} {len(frames):>7} {elapsed:>9.2f} {len(frames) / elapsed:>8.2f}")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,103 @@
+#!/usr/bin/env python3
+"""
+摄像头链路基准：虚拟摄像头（视频文件或合成画面，实时节奏+抖动+丢帧模型）驱动完整的
+CameraPredictor 采集→推理→绘制→编码链路，报告吞吐与端到端延迟（p50/p95/p99）、丢帧数。无需摄像头与显示器。
+默认使用合成替身模型（固定耗时 --infer-ms 模拟推理）；指定 --weights 时加载真实MTDETR模型。
+用法：python benchmarks/bench_camera_path.py [--source synthetic:640x480] [--fps 30] [--duration 10]
+                                             [--jitter-ms 2] [--drop-rate 0.01] [--infer-ms 40] [--slo-ms 0]
+"""
+import os
+import sys
+import json
+import time
+import argparse
+import tempfile
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import cv2
+from core.config import Config
+from core.predictors import CameraPredictor
+
+class SyntheticResult:
+    def __init__(self, frame):
+        self.frame = frame
+
+    def plot(self, img=None, **kwargs):
+        annotated = (img if img is not None else self.frame).copy()
+        cv2.rectangle(annotated, (8, 8), (40, 40), (0, 255, 0), 2)
+        return annotated
+
+class SyntheticModel:
+    """替身模型：按推理尺寸缩放固定耗时（模拟分辨率对推理时间的影响）"""
+    def __init__(self, infer_ms):
+        self.infer_ms = infer_ms
+
+    def predict(self, source, imgsz=640, **kwargs):
+        time.sleep(self.infer_ms / 1000.0 * (imgsz / 640.0) ** 2 * len(source))
+        return [SyntheticResult(frame) for frame in source]
+
+def main():
+    parser = argparse.ArgumentParser(description="摄像头链路延迟/吞吐基准（虚拟摄像头）")
+    parser.add_argument("--source", default="synthetic:640x480", help="视频文件路径或 synthetic[:宽x高]")
+    parser.add_argument("--fps", type=float, default=30, help="虚拟摄像头帧率（0=视频原帧率）")
+    parser.add_argument("--duration", type=float, default=10, help="运行时长（秒）")
+    parser.add_argument("--jitter-ms", type=float, default=2.0, help="每帧随机抖动上限（毫秒）")
+    parser.add_argument("--drop-rate", type=float, default=0.0, help="丢帧概率")
+    parser.add_argument("--drop-burst", type=int, default=1, help="每次连续丢帧数")
+    parser.add_argument("--infer-ms", type=float, default=40, help="替身模型在imgsz=640时的推理耗时（毫秒）")
+    parser.add_argument("--weights", default=None, help="真实模型权重（指定后不使用替身模型）")
+    parser.add_argument("--slo-ms", type=float, default=0, help="延迟SLO目标（毫秒，0=关闭）")
+    parser.add_argument("--json", default=None, help="结果JSON输出路径")
+    args = parser.parse_args()
+
+    Config.SAVE_TEMP_FRAMES = False
+    Config.VIRTUAL_CAMERA_FPS = args.fps
+    Config.VIRTUAL_CAMERA_JITTER_MS = args.jitter_ms
+    Config.VIRTUAL_CAMERA_DROP_RATE = args.drop_rate
+    Config.VIRTUAL_CAMERA_DROP_BURST = args.drop_burst
+    Config.CAMERA_LATENCY_SLO_MS = args.slo_ms
+
+    if args.weights:
+        from core.model_loader import load_mtdetr
+        model = load_mtdetr(args.weights)
+    else:
+        model = SyntheticModel(args.infer_ms)
+
+    with tempfile.TemporaryDirectory() as out_dir:
+        predictor = CameraPredictor(model, None, lambda msg: None)
+        predictor.set_save_dir(out_dir)
+        predictor.start(args.source)
+        if not predictor.is_running:
+            print(f"❌ 无法打开摄像头源：{args.source}")
+            return 1
+        start = time.perf_counter()
+        time.sleep(args.duration)
+        source = predictor.cap
+        predictor.stop()
+        elapsed = time.perf_counter() - start
+        summary = predictor.latency_summary()
+
+    summary["throughput_fps"] = round(predictor.frame_index / elapsed, 2)
+    summary["source"] = {
+        "name": args.source,
+        "fps": args.fps,
+        "delivered": getattr(source, "delivered", None),
+        "dropped_by_model": getattr(source, "dropped", None),
+    }
+    if predictor.slo:
+        summary["slo"] = {"target_ms": args.slo_ms, "final_point": predictor.slo.point.describe(), "changes": predictor.slo.changes}
+
+    print(f"source={args.source} fps={args.fps} jitter={args.jitter_ms}ms drop={args.drop_rate} duration={elapsed:.1f}s")
+    print(f"processed={predictor.frame_index} throughput={summary['throughput_fps']} fps  "
+          f"dropped(capture)={summary['dropped']['capture']} dropped(source)={summary['source']['dropped_by_model']}")
+    print(f"{'span':>18} {'p50':>9} {'p95':>9} {'p99':>9} {'max':>9}  (ms)")
+    for name, stats in summary["latency_ms"].items():
+        print(f"{name:>18} {stats['p50']:>9.2f} {stats['p95']:>9.2f} {stats['p99']:>9.2f} {stats['max']:>9.2f}")
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(summary, f, ensure_ascii=False, indent=2)
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,57 @@
+#!/usr/bin/env python3
+"""
+预览缩放微基准：对比旧路径（整帧BGR→RGB→PIL→LANCZOS）与新路径（数组上缩放→BGR→RGB→PIL）
+用法：python benchmarks/bench_preview_resize.py [--label 800x450] [--iters 200]
+无需显示器（不创建Tk窗口，也不生成PhotoImage）
+"""
+import os
+import sys
+import time
+import argparse
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import cv2
+from PIL import Image
+from gui.preview_panel import compute_preview_size, scale_frame
+
+def legacy_path(frame, label_size):
+    """旧实现：先整帧颜色转换，再PIL LANCZOS缩放（每帧重新计算尺寸）"""
+    frame_rgb = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
+    img = Image.fromarray(frame_rgb)
+    return img.resize(compute_preview_size(*img.size, *label_size), Image.Resampling.LANCZOS)
+
+def new_path(frame, target_size, quality):
+    """新实现：按缓存的目标尺寸先缩放数组，再对小图做颜色转换"""
+    small = scale_frame(frame, target_size, quality)
+    return Image.fromarray(cv2.cvtColor(small, cv2.COLOR_BGR2RGB))
+
+def bench(func, iters):
+    func()
+    start = time.perf_counter()
+    for _ in range(iters):
+        func()
+    return (time.perf_counter() - start) / iters * 1000
+
+def main():
+    parser = argparse.ArgumentParser(description="预览缩放路径微基准")
+    parser.add_argument("--label", default="800x450", help="预览标签尺寸（宽x高）")
+    parser.add_argument("--iters", type=int, default=200, help="每组迭代次数")
+    args = parser.parse_args()
+    label_size = tuple(int(v) for v in args.label.lower().split("x"))
+
+    rng = np.random.default_rng(0)
+    print(f"label={label_size[0]}x{label_size[1]}  ms/frame")
+    print(f"{'source':>8} {'legacy':>9} {'high':>9} {'fast':>9} {'speedup':>8}")
+    for name, (w, h) in (("720p", (1280, 720)), ("4K", (3840, 2160))):
+        frame = rng.integers(0, 256, (h, w, 3), dtype=np.uint8)
+        target = compute_preview_size(w, h, *label_size)
+        legacy_ms = bench(lambda: legacy_path(frame, label_size), args.iters)
+        high_ms = bench(lambda: new_path(frame, target, "high"), args.iters)
+        fast_ms = bench(lambda: new_path(frame, target, "fast"), args.iters)
+        print(f"{name:>8} {legacy_ms:>9.2f} {high_ms:>9.2f} {fast_ms:>9.2f} {legacy_ms / fast_ms:>7.1f}x")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
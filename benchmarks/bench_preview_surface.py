@@ -0,0 +1,122 @@
+#!/usr/bin/env python3
+"""
+预览上屏基准：以固定帧率（默认30fps）向Tk标签推送帧，对比三种上屏方式的进程CPU占用与GC次数
+- swap：旧实现，每帧新建 ImageTk.PhotoImage 并重新绑定标签
+- ppm：每帧把RGB像素写入PPM缓冲，bytes() 拷贝后 put 到同一个 tk.PhotoImage
+- surface：当前实现 PhotoSurface（共享内存RGBA缓冲 + ImageTk.PhotoImage.paste 原地更新）
+用法：python benchmarks/bench_preview_surface.py [--size 800x450] [--fps 30] [--seconds 10]
+需要图形界面（Linux无显示器时可在 xvfb-run 下运行）
+"""
+import os
+import gc
+import sys
+import time
+import argparse
+import tkinter as tk
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import cv2
+from PIL import Image, ImageTk
+from gui.preview_surface import PhotoSurface
+
+class SwapPath:
+    """旧实现：每帧 BGR→RGB→PIL→新 ImageTk.PhotoImage，标签重新绑定"""
+    def __init__(self, label):
+        self.label = label
+        self.photo = None
+
+    def update(self, frame):
+        self.photo = ImageTk.PhotoImage(Image.fromarray(cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)))
+        self.label.config(image=self.photo)
+
+class PpmPath:
+    """PPM缓冲：颜色转换写入预分配缓冲，每帧 bytes() 拷贝后由Tcl解析PPM并 put"""
+    def __init__(self, label):
+        self.label = label
+        self.photo = None
+        self.size = None
+
+    def update(self, frame):
+        height, width = frame.shape[:2]
+        if self.size != (width, height):
+            header = f"P6 {width} {height} 255\n".encode("ascii")
+            self.buffer = bytearray(len(header) + width * height * 3)
+            self.buffer[:len(header)] = header
+            self.pixels = np.frombuffer(self.buffer, dtype=np.uint8, offset=len(header)).reshape(height, width, 3)
+            self.photo = tk.PhotoImage(master=self.label, width=width, height=height)
+            self.label.config(image=self.photo)
+            self.size = (width, height)
+        cv2.cvtColor(frame, cv2.COLOR_BGR2RGB, dst=self.pixels)
+        self.photo.tk.call(self.photo.name, "put", bytes(self.buffer), "-format", "ppm", "-to", 0, 0)
+
+class SurfacePath:
+    """当前实现：PhotoSurface 原地更新，仅重新分配时绑定标签"""
+    def __init__(self, label):
+        self.label = label
+        self.surface = PhotoSurface(label)
+
+    def update(self, frame):
+        if self.surface.update(frame):
+            self.label.config(image=self.surface.photo)
+
+def run(root, label, path, frames, fps, seconds):
+    """按固定帧率上屏，返回 (每帧CPU毫秒, 每帧上屏毫秒, 各代GC次数)"""
+    interval = 1.0 / fps
+    total = int(fps * seconds)
+    render_s = 0.0
+    state = {"index": 0}
+    gc.collect()
+    gc_before = [s["collections"] for s in gc.get_stats()]
+    cpu_start = time.process_time()
+    start = time.perf_counter()
+
+    def tick():
+        nonlocal render_s
+        i = state["index"]
+        if i >= total:
+            root.quit()
+            return
+        t0 = time.perf_counter()
+        path.update(frames[i % len(frames)])
+        root.update_idletasks()
+        render_s += time.perf_counter() - t0
+        state["index"] = i + 1
+        delay = start + (i + 1) * interval - time.perf_counter()
+        root.after(max(0, int(delay * 1000)), tick)
+
+    root.after(0, tick)
+    root.mainloop()
+    cpu_ms = (time.process_time() - cpu_start) / total * 1000
+    gc_after = [s["collections"] for s in gc.get_stats()]
+    return cpu_ms, render_s / total * 1000, [a - b for a, b in zip(gc_after, gc_before)]
+
+def main():
+    parser = argparse.ArgumentParser(description="预览上屏方式基准（CPU/GC）")
+    parser.add_argument("--size", default="800x450", help="预览帧尺寸（宽x高）")
+    parser.add_argument("--fps", type=float, default=30.0, help="上屏帧率")
+    parser.add_argument("--seconds", type=float, default=10.0, help="每种方式运行时长（秒）")
+    args = parser.parse_args()
+    width, height = (int(v) for v in args.size.lower().split("x"))
+
+    try:
+        root = tk.Tk()
+    except tk.TclError as e:
+        print(f"❌ 无法创建Tk窗口（需要图形界面，可用 xvfb-run 运行）：{str(e)}")
+        return 2
+    label = tk.Label(root)
+    label.pack()
+    rng = np.random.default_rng(0)
+    frames = [rng.integers(0, 256, (height, width, 3), dtype=np.uint8) for _ in range(8)]
+
+    print(f"size={width}x{height} fps={args.fps:g} seconds={args.seconds:g}")
+    print(f"{'path':>8} {'cpu ms/frame':>13} {'render ms':>10} {'gc gen0/1/2':>14}")
+    for name, cls in (("swap", SwapPath), ("ppm", PpmPath), ("surface", SurfacePath)):
+        cpu_ms, render_ms, collections = run(root, label, cls(label), frames, args.fps, args.seconds)
+        print(f"{name:>8} {cpu_ms:>13.2f} {render_ms:>10.2f} {'/'.join(map(str, collections)):>14}")
+    root.destroy()
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,153 @@
+#!/usr/bin/env python3
+"""
+线程/CPU亲和性扫描：在本机逐一测试 torch算子内线程数 × 算子间线程数 × OpenCV线程数 × 推理线程CPU绑定 的组合，
+以解码→推理→编码三阶段流水线的吞吐（帧/秒）排序，给出最优的 Config 设置
+每个组合在独立子进程中运行（torch算子间线程数每个进程只能设置一次）
+用法：python benchmarks/bench_runtime_sweep.py [--video 路径] [--frames 48] [--intra 1,2,4,0] [--interop 1,0]
+                                              [--cv2 0,-1] [--affinity "none;0-3"]
+模型：权重存在时使用 Config.INFERENCE_BACKEND 后端，否则（或 --synthetic）使用合成卷积网络负载
+"""
+import os
+import sys
+import json
+import time
+import argparse
+import itertools
+import subprocess
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from core.config import Config
+
+def parse_ints(text):
+    return [int(v) for v in text.split(",") if v.strip()]
+
+def build_synthetic_model():
+    """合成负载：若干卷积层，计算量与imgsz相关，能体现torch线程数的影响"""
+    import torch
+    net = torch.nn.Sequential(*[
+        layer for i in range(6)
+        for layer in (torch.nn.Conv2d(3 if i == 0 else 32, 32, 3, padding=1), torch.nn.ReLU())
+    ]).eval()
+
+    class SyntheticModel:
+        def predict(self, source, imgsz=640, **kwargs):
+            import cv2
+            batch = torch.stack([
+                torch.from_numpy(cv2.resize(f, (imgsz, imgsz))).permute(2, 0, 1).float() / 255.0 for f in source
+            ])
+            with torch.inference_mode():
+                return list(net(batch))
+    return SyntheticModel()
+
+def worker(args):
+    """子进程：应用一组线程配置，运行流水线并输出JSON结果"""
+    import cv2
+    import numpy as np
+    from core.runtime import apply_runtime_config
+    from core.pipeline import StagePipeline
+
+    Config.TORCH_INTRA_OP_THREADS = args.intra
+    Config.TORCH_INTEROP_THREADS = args.interop
+    Config.CV2_THREADS = args.cv2
+    if args.affinity and args.affinity != "none":
+        # 推理独占给定CPU，其余阶段使用剩余CPU
+        infer_cpus = args.affinity
+        rest = sorted(set(range(os.cpu_count() or 1)) - set(int(c) for c in _expand(args.affinity)))
+        Config.CPU_AFFINITY = {"infer": infer_cpus}
+        if rest:
+            Config.CPU_AFFINITY.update({"decode": rest, "encode": rest})
+    apply_runtime_config(lambda msg: None)
+
+    if args.synthetic or not os.path.exists(Config.MODEL_WEIGHT_PATH):
+        model = build_synthetic_model()
+    else:
+        from core.backends import load_backend
+        model = load_backend(Config.INFERENCE_BACKEND, logger=lambda msg: None)
+
+    def decode():
+        if args.video:
+            cap = cv2.VideoCapture(args.video)
+            for _ in range(args.frames):
+                ret, frame = cap.read()
+                if not ret:
+                    break
+                yield frame
+            cap.release()
+        else:
+            rng = np.random.default_rng(0)
+            base = rng.integers(0, 256, (720, 1280, 3), dtype=np.uint8)
+            for _ in range(args.frames):
+                yield cv2.GaussianBlur(base, (5, 5), 0)  # 模拟解码的CPU开销
+
+    def infer(frame):
+        model.predict(source=[frame], save=False, device="cpu", imgsz=args.imgsz, conf=Config.CONF_THRESHOLD, verbose=False)
+        return frame
+
+    def encode(frame):
+        cv2.imencode(".jpg", frame)
+
+    frame = next(decode())
+    infer(frame)  # 预热
+    start = time.perf_counter()
+    pipeline = StagePipeline(source=decode(), stages=[("infer", infer), ("encode", encode)], queue_size=4)
+    pipeline.run()
+    elapsed = time.perf_counter() - start
+    print(json.dumps({"fps": args.frames / elapsed}))
+    return 0
+
+def _expand(spec):
+    from core.runtime import parse_cpu_list
+    return parse_cpu_list(spec)
+
+def main():
+    parser = argparse.ArgumentParser(description="线程数/CPU亲和性扫描")
+    parser.add_argument("--video", default=None, help="测试视频（默认合成帧）")
+    parser.add_argument("--frames", type=int, default=48, help="每个组合处理的帧数")
+    parser.add_argument("--imgsz", type=int, default=Config.IMGSZ, help="推理尺寸")
+    parser.add_argument("--intra", default=f"1,2,4,{os.cpu_count() or 1}", help="torch算子内线程数列表（0=默认）")
+    parser.add_argument("--interop", default="1,0", help="torch算子间线程数列表（0=默认）")
+    parser.add_argument("--cv2", default="0,-1", help="OpenCV线程数列表（-1=默认）")
+    parser.add_argument("--affinity", default="none", help="推理线程CPU集合列表，分号分隔（none=不绑定），如 \"none;0-3\"")
+    parser.add_argument("--synthetic", action="store_true", help="强制使用合成卷积负载")
+    parser.add_argument("--worker", action="store_true", help=argparse.SUPPRESS)
+    parser.add_argument("--intra-value", type=int, dest="intra_value", help=argparse.SUPPRESS)
+    args, _ = parser.parse_known_args()
+
+    if args.worker:
+        args.intra = args.intra_value
+        args.interop = int(args.interop)
+        args.cv2 = int(args.cv2)
+        return worker(args)
+
+    combos = list(itertools.product(parse_ints(args.intra), parse_ints(args.interop), parse_ints(args.cv2),
+                                    [a.strip() for a in args.affinity.split(";") if a.strip()]))
+    print(f"CPU核数={os.cpu_count()}  组合数={len(combos)}  帧数={args.frames}")
+    print(f"{'intra':>6} {'interop':>8} {'cv2':>5} {'affinity':>10} {'fps':>8}")
+    results = []
+    for intra, interop, cv2_threads, affinity in combos:
+        cmd = [sys.executable, os.path.abspath(__file__), "--worker",
+               "--intra-value", str(intra), "--interop", str(interop), "--cv2", str(cv2_threads),
+               "--affinity", affinity, "--frames", str(args.frames), "--imgsz", str(args.imgsz)]
+        if args.video:
+            cmd += ["--video", args.video]
+        if args.synthetic:
+            cmd.append("--synthetic")
+        proc = subprocess.run(cmd, capture_output=True, text=True)
+        try:
+            fps = json.loads(proc.stdout.strip().splitlines()[-1])["fps"]
+        except (IndexError, ValueError, KeyError):
+            print(f"{intra:>6} {interop:>8} {cv2_threads:>5} {affinity:>10} {'失败':>8}  {proc.stderr.strip().splitlines()[-1:]}")
+            continue
+        results.append((fps, intra, interop, cv2_threads, affinity))
+        print(f"{intra:>6} {interop:>8} {cv2_threads:>5} {affinity:>10} {fps:>8.2f}")
+
+    if not results:
+        return 1
+    fps, intra, interop, cv2_threads, affinity = max(results)
+    print(f"\n最优：{fps:.2f} fps → Config.TORCH_INTRA_OP_THREADS={intra}, TORCH_INTEROP_THREADS={interop}, "
+          f"CV2_THREADS={cv2_threads}" + (f", CPU_AFFINITY={{'infer': '{affinity}'}}" if affinity != "none" else ""))
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
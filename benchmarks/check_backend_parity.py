@@ -0,0 +1,82 @@
+#!/usr/bin/env python3
+"""
+推理后端一致性/精度-速度报告：同一批样本帧分别用 PyTorch float32（参考）与各候选后端推理，逐任务头对比
+检测伪mAP（以float32输出为真值）、合并掩码IoU，并报告每帧推理耗时与加速比（用于各站点选择float32/INT8变体）
+用法：python benchmarks/check_backend_parity.py --samples <图片目录或视频> [--backend onnx onnx-int8-dynamic onnx-int8-static]
+                                                [--calibration <校准图片目录>] [--frames 32]
+                                                [--min-map50 0.95] [--min-mask-iou 0.95] [--json report.json]
+退出码：0=各任务头均达到阈值；1=未达到阈值；2=没有可用样本
+"""
+import os
+import sys
+import json
+import time
+import argparse
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from core.config import Config
+from core.backends import BACKENDS, load_backend
+from core.evaluation import compare_backends, load_sample_frames
+
+def run_backend(model, frames, device):
+    """逐帧推理（预热1帧），返回(结果列表, 每帧平均毫秒)"""
+    kwargs = dict(save=False, device=device, imgsz=Config.IMGSZ, conf=Config.CONF_THRESHOLD,
+                  mask_threshold=[0.4, 0.9], verbose=False)
+    model.predict(source=frames[:1], **kwargs)
+    results = []
+    start = time.perf_counter()
+    for frame in frames:
+        results.extend(model.predict(source=[frame], **kwargs))
+    return results, (time.perf_counter() - start) / len(frames) * 1000
+
+def main():
+    parser = argparse.ArgumentParser(description="推理后端与PyTorch输出一致性检查")
+    parser.add_argument("--samples", required=True, help="样本图片目录或视频文件")
+    parser.add_argument("--backend", nargs="+", default=["onnx"], choices=[b for b in BACKENDS if b != "torch"],
+                        help="候选后端（可多个，如 onnx onnx-int8-dynamic onnx-int8-static）")
+    parser.add_argument("--calibration", default=None, help="INT8静态量化的校准样本图片目录（默认同--samples）")
+    parser.add_argument("--frames", type=int, default=32, help="样本帧数上限")
+    parser.add_argument("--device", default="cpu", help="推理设备")
+    parser.add_argument("--min-map50", type=float, default=0.95, help="各任务头伪mAP@0.5下限")
+    parser.add_argument("--min-mask-iou", type=float, default=0.95, help="各任务头掩码IoU下限")
+    parser.add_argument("--json", default=None, help="报告JSON输出路径")
+    args = parser.parse_args()
+
+    frames = load_sample_frames(args.samples, args.frames)
+    if not frames:
+        print(f"❌ 没有可用样本帧：{args.samples}")
+        return 2
+    Config.QUANT_CALIBRATION_DIR = args.calibration or (args.samples if os.path.isdir(args.samples) else None)
+
+    ref_results, ref_ms = run_backend(load_backend("torch"), frames, args.device)
+    report = {"frames": len(frames), "torch_ms_per_frame": round(ref_ms, 2), "backends": {}}
+    ok = True
+    fmt = lambda v: "-" if v is None else f"{v:.3f}"
+    print(f"frames={len(frames)} torch(float32)={ref_ms:.1f}ms/frame")
+    print(f"{'backend':>18} {'ms':>8} {'speedup':>8} {'head':>6} {'mAP50':>7} {'mAP50-95':>9} {'maskIoU':>8} {'dets':>6} {'Δcount':>7}")
+    for backend in args.backend:
+        candidate = load_backend(backend)
+        cand_results, cand_ms = run_backend(candidate, frames, args.device)
+        entry = {
+            "model": candidate.source_path,
+            "ms_per_frame": round(cand_ms, 2),
+            "speedup": round(ref_ms / cand_ms, 2) if cand_ms > 0 else None,
+            "heads": compare_backends(ref_results, cand_results),
+        }
+        report["backends"][backend] = entry
+        for head, stats in entry["heads"].items():
+            print(f"{backend:>18} {cand_ms:>8.1f} {fmt(entry['speedup']):>8} {head:>6} {fmt(stats['map50']):>7} "
+                  f"{fmt(stats['map50_95']):>9} {fmt(stats['mask_iou']):>8} {stats['detections_ref']:>6} {stats['detection_count_diff']:>7}")
+            if stats["map50"] is not None and stats["map50"] < args.min_map50:
+                ok = False
+            if stats["mask_iou"] is not None and stats["mask_iou"] < args.min_mask_iou:
+                ok = False
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+    print("✅ 一致性检查通过" if ok else "❌ 一致性检查未通过（量化模型可适当放宽 --min-map50 / --min-mask-iou）")
+    return 0 if ok else 1
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,115 @@
+#!/usr/bin/env python3
+"""
+内存浸泡测试：用合成视频源（默认100万帧）驱动 VideoPredictor 的解码→推理→渲染→编码流水线，
+检查常驻内存（RSS）峰值不随帧数增长。模型为合成替身（只绘制固定标注），不需要权重文件。
+用法：python benchmarks/soak_memory.py [--frames 1000000] [--tolerance-mb 16]
+退出码：0=内存平稳；1=超出容差
+"""
+import os
+import sys
+import time
+import argparse
+import threading
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import cv2
+from core.config import Config
+from core.pacing import FramePacer
+from core.pipeline import StagePipeline
+from core.predictors import VideoPredictor
+
+def current_rss_mb():
+    """当前常驻内存（MB），Linux读取/proc，其他平台退化为峰值RSS"""
+    try:
+        with open("/proc/self/statm", "r") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") / 1024 / 1024
+    except OSError:
+        import resource
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+class SyntheticCapture:
+    """合成视频源：按需生成新帧（每帧新分配内存，与真实解码一致）"""
+    def __init__(self, total_frames, size=(96, 160)):
+        self.total_frames = total_frames
+        self.size = size
+        self.index = 0
+
+    def isOpened(self):
+        return True
+
+    def read(self):
+        if self.index >= self.total_frames:
+            return False, None
+        frame = np.full((*self.size, 3), self.index % 256, dtype=np.uint8)
+        self.index += 1
+        return True, frame
+
+class SyntheticResult:
+    def __init__(self, frame):
+        self.frame = frame
+
+    def plot(self, img=None, **kwargs):
+        annotated = (img if img is not None else self.frame).copy()
+        cv2.rectangle(annotated, (8, 8), (40, 40), (0, 255, 0), 2)
+        return annotated
+
+class SyntheticModel:
+    def predict(self, source, **kwargs):
+        return [SyntheticResult(frame) for frame in source]
+
+def main():
+    parser = argparse.ArgumentParser(description="VideoPredictor 长时运行内存浸泡测试")
+    parser.add_argument("--frames", type=int, default=1_000_000, help="合成帧数")
+    parser.add_argument("--batch", type=int, default=4, help="批大小")
+    parser.add_argument("--tolerance-mb", type=float, default=16.0, help="预热后允许的RSS峰值增长（MB）")
+    args = parser.parse_args()
+
+    Config.SAVE_TEMP_FRAMES = False
+    predictor = VideoPredictor(SyntheticModel(), None, lambda msg: None, None)
+    predictor.is_running = True
+    cap = SyntheticCapture(args.frames)
+    frame_size = (cap.size[1], cap.size[0])
+
+    pipeline = StagePipeline(
+        source=predictor._decode_batches(cap, args.batch),
+        stages=[
+            ("infer", predictor._infer_batch),
+            ("render", lambda batch: predictor._render_batch(batch, FramePacer("max"))),
+            ("encode", lambda batch: predictor._encode_batch(batch, frame_size, 30)),
+        ],
+        queue_size=Config.PIPELINE_QUEUE_SIZE,
+        should_run=lambda: predictor.is_running
+    )
+
+    # 后台采样RSS：分别记录预热段（前10%）与其余部分的峰值
+    samples = []
+    done = threading.Event()
+    def sample_loop():
+        while not done.is_set():
+            samples.append((cap.index, current_rss_mb()))
+            time.sleep(0.2)
+    sampler = threading.Thread(target=sample_loop, daemon=True)
+    sampler.start()
+
+    start = time.perf_counter()
+    completed = pipeline.run()
+    elapsed = time.perf_counter() - start
+    done.set()
+    sampler.join()
+    samples.append((cap.index, current_rss_mb()))
+
+    warmup_end = args.frames // 10
+    warm_peak = max((rss for idx, rss in samples if idx <= warmup_end), default=samples[0][1])
+    run_peak = max(rss for idx, rss in samples)
+    growth = run_peak - warm_peak
+    print(f"frames={predictor.processed_frames} completed={completed} elapsed={elapsed:.1f}s fps={predictor.processed_frames / elapsed:.0f}")
+    print(f"frame_info_list={len(predictor.frame_info_list)} (cap {Config.FRAME_INFO_CAP})")
+    print(f"RSS peak warmup={warm_peak:.1f}MB run={run_peak:.1f}MB growth={growth:.1f}MB tolerance={args.tolerance_mb}MB")
+    ok = completed and growth <= args.tolerance_mb
+    print("✅ 内存平稳" if ok else "❌ 内存随帧数增长")
+    return 0 if ok else 1
+
+if __name__ == "__main__":
+    sys.exit(main())
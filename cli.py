@@ -0,0 +1,8 @@
+#!/usr/bin/env python3
+import sys
+import multiprocessing
+from core.cli import main
+
+if __name__ == "__main__":
+    multiprocessing.freeze_support()  # 打包EXE下分片推理子进程需要
+    sys.exit(main())
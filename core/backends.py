@@ -0,0 +1,125 @@
+#!/usr/bin/env python3
+import os
+import shutil
+from core.config import Config
+from core.model_loader import setup_import_paths, load_mtdetr
+
+BACKENDS = ("torch", "torch-optimized", "onnx", "onnx-int8-dynamic", "onnx-int8-static")
+
+class InferenceBackend:
+    """
+    推理后端：各预测器只调用 predict()，参数与返回值与 ultralytics MTDETR.predict 一致
+    （Results 列表，多任务头时每项为各头结果的列表），后端切换对预测器透明
+    """
+    name = "base"
+
+    def __init__(self, model, source_path):
+        self.model = model
+        self.source_path = source_path  # 实际加载的模型文件（.pt / .onnx）
+
+    def predict(self, source, **kwargs):
+        return self.model.predict(source=source, **kwargs)
+
+    def __getattr__(self, item):
+        # 其余属性（names、task等）透传给底层模型
+        if item == "model":
+            raise AttributeError(item)
+        return getattr(self.model, item)
+
+class TorchBackend(InferenceBackend):
+    """PyTorch后端：直接使用 MTDETR(.pt)"""
+    name = "torch"
+
+class OptimizedTorchBackend(InferenceBackend):
+    """PyTorch优化引擎后端：加载时应用Conv-BN融合、channels_last、torch.compile，推理在inference_mode下执行"""
+    name = "torch-optimized"
+
+    def __init__(self, engine, source_path):
+        super().__init__(engine.mtdetr, source_path)
+        self.engine = engine
+
+    def predict(self, source, **kwargs):
+        return self.engine.predict(source, **kwargs)
+
+class OnnxBackend(InferenceBackend):
+    """
+    ONNX Runtime后端：MTDETR(.onnx) 由 ultralytics AutoBackend 通过 onnxruntime 执行，
+    前后处理（含检测头与分割头的解码、NMS、掩码）与PyTorch路径共用同一套代码，输出结构一致
+    """
+    name = "onnx"
+
+class OnnxInt8Backend(OnnxBackend):
+    """ONNX Runtime INT8后端：由float32 ONNX量化得到（dynamic/static），同样经AutoBackend执行，输出结构不变"""
+    def __init__(self, model, source_path, mode):
+        super().__init__(model, source_path)
+        self.name = f"onnx-int8-{mode}"
+
+def onnx_cache_path(weight_path, suffix=""):
+    """导出缓存路径：与权重同目录同名，例如 best.pt → best.onnx / best.int8.onnx"""
+    return os.path.splitext(weight_path)[0] + suffix + ".onnx"
+
+def is_cache_fresh(cache_path, weight_path):
+    """缓存存在且不早于权重文件（权重更新后自动重新导出）"""
+    return os.path.exists(cache_path) and os.path.getmtime(cache_path) >= os.path.getmtime(weight_path)
+
+def export_onnx(weight_path=None, imgsz=None, logger=print):
+    """
+    导出ONNX并缓存到权重旁（已有新鲜缓存时直接返回）
+    使用动态输入尺寸，推理分辨率（含延迟SLO降档）可在运行时变化
+    """
+    weight_path = weight_path or Config.MODEL_WEIGHT_PATH
+    cache_path = onnx_cache_path(weight_path)
+    if is_cache_fresh(cache_path, weight_path):
+        return cache_path
+    logger(f"📦 正在导出ONNX模型（首次运行，之后复用缓存）：{cache_path}")
+    model = load_mtdetr(weight_path)
+    exported = model.export(format="onnx", imgsz=imgsz or Config.IMGSZ, dynamic=True, simplify=False)
+    exported = str(exported)
+    if os.path.abspath(exported) != os.path.abspath(cache_path):
+        shutil.move(exported, cache_path)
+    logger(f"✅ ONNX模型已导出：{cache_path}")
+    return cache_path
+
+def _require_onnxruntime():
+    try:
+        import onnxruntime  # noqa: F401
+    except ImportError as e:
+        raise RuntimeError("ONNX后端需要安装 onnxruntime（pip install onnxruntime）") from e
+
+def load_backend(backend=None, weight_path=None, logger=print):
+    """
+    按名称加载推理后端（默认 Config.INFERENCE_BACKEND）：
+    - torch：MTDETR(.pt)
+    - torch-optimized：MTDETR(.pt) + 优化推理引擎（启动时实测并报告加速比，编译缓存写到权重旁）
+    - onnx：首次导出并缓存 .onnx，之后直接加载缓存
+    - onnx-int8-dynamic / onnx-int8-static：在缓存的 .onnx 基础上量化并缓存INT8模型（static使用 Config.QUANT_CALIBRATION_DIR 校准）
+    未知名称抛出 ValueError；缺少依赖等加载失败时抛出异常，由调用方决定提示方式
+    """
+    backend = (backend or Config.INFERENCE_BACKEND or "torch").lower()
+    weight_path = weight_path or Config.MODEL_WEIGHT_PATH
+    if backend not in BACKENDS:
+        raise ValueError(f"未知的推理后端：{backend}（可选：{', '.join(BACKENDS)}）")
+    if backend == "torch":
+        return TorchBackend(load_mtdetr(weight_path), weight_path)
+    if backend == "torch-optimized":
+        from core.engine import OptimizedTorchEngine
+        engine = OptimizedTorchEngine(load_mtdetr(weight_path), weight_path, logger, Config.ENGINE_BENCH_RUNS).apply()
+        return OptimizedTorchBackend(engine, weight_path)
+
+    _require_onnxruntime()
+    onnx_path = export_onnx(weight_path, logger=logger)
+    setup_import_paths()
+    from ultralytics import MTDETR
+    if backend == "onnx":
+        return OnnxBackend(MTDETR(onnx_path), onnx_path)
+
+    from core.quantization import build_int8_model
+    mode = backend.rsplit("-", 1)[-1]
+    int8_path = build_int8_model(
+        onnx_path, mode,
+        calibration_dir=Config.QUANT_CALIBRATION_DIR,
+        calibration_frames=Config.QUANT_CALIBRATION_FRAMES,
+        imgsz=Config.IMGSZ,
+        logger=logger
+    )
+    return OnnxInt8Backend(MTDETR(int8_path), int8_path, mode)
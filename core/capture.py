@@ -0,0 +1,207 @@
+#!/usr/bin/env python3
+import os
+import sys
+import time
+import random
+import threading
+import cv2
+import numpy as np
+from core.pacing import FramePacer
+from core.runtime import pin_current_thread
+
+SYNTHETIC_PREFIX = "synthetic"
+
+class VirtualCamera:
+    """
+    虚拟摄像头：把视频文件或合成画面按实时节奏输出，接口与 cv2.VideoCapture 一致（read/get/set/isOpened/release）
+    用于无摄像头硬件的机器（如Linux测试机/CI）基准测试与回归测试摄像头链路
+    - 实时节奏：read() 按帧率阻塞到下一帧时刻（单调时钟，漂移校正），与真实设备一样不会提前给帧
+    - 抖动：每帧额外延迟 0~jitter_ms 毫秒（均匀分布），模拟USB/驱动调度抖动
+    - 丢帧模型：每帧以 drop_rate 概率触发丢帧，一次连续丢失 drop_burst 帧（这些帧的时间照常流逝但不交付）
+    source 为视频路径（到末尾后循环），或 "synthetic" / "synthetic:640x480" 合成移动方块画面
+    release() 可在其他线程调用：正在 read() 的采集线程随后返回 (False, None)
+    """
+    def __init__(self, source, fps=0, jitter_ms=0.0, drop_rate=0.0, drop_burst=1, loop=True, seed=None):
+        self.source = source
+        self.jitter_ms = max(0.0, float(jitter_ms))
+        self.drop_rate = min(max(0.0, float(drop_rate)), 1.0)
+        self.drop_burst = max(1, int(drop_burst))
+        self.loop = loop
+        self._rng = random.Random(seed)
+        self._cap = None
+        self._synthetic_size = None
+        self._lock = threading.Lock()  # 保护 _cap/_synthetic_size，release() 与采集线程的 read() 并发
+        self._index = 0
+        self.delivered = 0
+        self.dropped = 0  # 丢帧模型丢弃的帧数
+        if str(source).startswith(SYNTHETIC_PREFIX):
+            _, _, size = str(source).partition(":")
+            width, height = (int(v) for v in size.lower().split("x")) if size else (640, 480)
+            self._synthetic_size = (width, height)
+            source_fps = 30.0
+        else:
+            self._cap = cv2.VideoCapture(source)
+            source_fps = self._cap.get(cv2.CAP_PROP_FPS) if self._cap.isOpened() else 0
+        self.fps = float(fps) if fps and fps > 0 else (source_fps if source_fps and source_fps > 0 else 30.0)
+        self._pacer = FramePacer("target-fps", self.fps)
+
+    def isOpened(self):
+        return self._synthetic_size is not None or (self._cap is not None and self._cap.isOpened())
+
+    def get(self, prop_id):
+        if prop_id == cv2.CAP_PROP_FPS:
+            return self.fps
+        synthetic_size, cap = self._synthetic_size, self._cap  # 取快照，避免与 release() 并发时读到 None
+        if synthetic_size is not None:
+            if prop_id == cv2.CAP_PROP_FRAME_WIDTH:
+                return float(synthetic_size[0])
+            if prop_id == cv2.CAP_PROP_FRAME_HEIGHT:
+                return float(synthetic_size[1])
+            return 0.0
+        return cap.get(prop_id) if cap is not None else 0.0
+
+    def set(self, prop_id, value):
+        """与真实设备一样可能忽略设置：分辨率/缓冲区设置不生效，返回False"""
+        return False
+
+    def _next_source_frame(self):
+        """取下一帧源画面（调用方持有 _lock）；已释放时返回 (False, None)"""
+        if self._synthetic_size is not None:
+            width, height = self._synthetic_size
+            frame = np.zeros((height, width, 3), dtype=np.uint8)
+            frame[:, :, 1] = np.linspace(0, 160, width, dtype=np.uint8)[None, :]
+            x = (self._index * 8) % max(1, width - 80)
+            cv2.rectangle(frame, (x, height // 3), (x + 80, height // 3 + 80), (0, 0, 255), -1)
+            cv2.putText(frame, str(self._index), (10, 30), cv2.FONT_HERSHEY_SIMPLEX, 1, (255, 255, 255), 2)
+            self._index += 1
+            return True, frame
+        if self._cap is None:
+            return False, None
+        ret, frame = self._cap.read()
+        if not ret and self.loop:
+            self._cap.set(cv2.CAP_PROP_POS_FRAMES, 0)
+            ret, frame = self._cap.read()
+        self._index += 1
+        return ret, frame
+
+    def read(self):
+        """阻塞到下一帧时刻后返回 (ret, frame)；丢帧模型命中时跳过若干帧（时间照常流逝）"""
+        if not self.isOpened():
+            return False, None
+        if self.drop_rate > 0 and self._rng.random() < self.drop_rate:
+            for _ in range(self.drop_burst):
+                self._pacer.wait()
+                with self._lock:
+                    self._next_source_frame()
+                self.dropped += 1
+        self._pacer.wait()
+        if self.jitter_ms > 0:
+            time.sleep(self._rng.uniform(0, self.jitter_ms) / 1000.0)
+        with self._lock:
+            ret, frame = self._next_source_frame()
+        if ret:
+            self.delivered += 1
+        return ret, frame
+
+    def release(self):
+        with self._lock:
+            if self._cap is not None:
+                self._cap.release()
+                self._cap = None
+            self._synthetic_size = None
+
+def open_camera(camera_id, fps=0, jitter_ms=0.0, drop_rate=0.0, drop_burst=1):
+    """
+    打开摄像头源：
+    - 数字ID → 物理摄像头（Windows使用DirectShow后端减少帧丢失，其他平台使用默认后端）
+    - 视频文件路径或 "synthetic[:宽x高]" → VirtualCamera（实时节奏、抖动、丢帧模型由参数指定）
+    无效ID抛出 ValueError
+    """
+    camera_id = str(camera_id).strip()
+    if camera_id.isdigit():
+        if sys.platform.startswith("win"):
+            return cv2.VideoCapture(int(camera_id), cv2.CAP_DSHOW)
+        return cv2.VideoCapture(int(camera_id))
+    if camera_id.startswith(SYNTHETIC_PREFIX) or os.path.isfile(camera_id):
+        return VirtualCamera(camera_id, fps=fps, jitter_ms=jitter_ms, drop_rate=drop_rate, drop_burst=drop_burst)
+    raise ValueError(f"无效的摄像头源：{camera_id}")
+
+class LatestFrameGrabber:
+    """
+    低延迟采集线程：专用线程持续读取设备，只保留最新一帧及其采集时间戳
+    - 驱动缓冲区被持续读空，CAP_PROP_BUFFERSIZE 被后端忽略时也不会积压旧帧
+    - 推理线程通过 read_latest() 总是取到最新帧，未被取走就被覆盖的帧计入 dropped
+    - 采集时间戳使用 time.perf_counter()，与推理/显示各阶段的计时在同一时钟上
+    """
+    def __init__(self, cap, logger=print, name="camera-grabber"):
+        self.cap = cap
+        self.logger = logger
+        self.name = name
+        self._cond = threading.Condition()
+        self._frame = None
+        self._timestamp = 0.0
+        self._seq = 0  # 已采集帧序号（从1开始）
+        self._consumed_seq = 0  # 最近一次被取走的帧序号
+        self.dropped = 0  # 被新帧覆盖、从未送入推理的帧数
+        self.read_failures = 0
+        self._running = False
+        self._thread = None
+
+    def start(self):
+        if self._thread is not None:
+            return
+        self._running = True
+        self._thread = threading.Thread(target=self._loop, name=self.name, daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout=1.0):
+        """停止采集线程并唤醒等待中的读取方（不释放cap，由调用方负责）"""
+        with self._cond:
+            self._running = False
+            self._cond.notify_all()
+        if self._thread is not None and self._thread is not threading.current_thread():
+            self._thread.join(timeout=timeout)
+        self._thread = None
+
+    @property
+    def running(self):
+        return self._running
+
+    def _loop(self):
+        pin_current_thread("capture")
+        failures_in_row = 0
+        while self._running:
+            ret, frame = self.cap.read()
+            timestamp = time.perf_counter()
+            if not ret or frame is None:
+                self.read_failures += 1
+                failures_in_row += 1
+                if failures_in_row == 1:
+                    self.logger("⚠️ 无法读取摄像头帧，重试中...")
+                time.sleep(0.05)
+                continue
+            failures_in_row = 0
+            with self._cond:
+                if self._seq > self._consumed_seq:
+                    self.dropped += 1
+                self._frame = frame
+                self._timestamp = timestamp
+                self._seq += 1
+                self._cond.notify_all()
+
+    def read_latest(self, timeout=1.0):
+        """
+        等待并取出比上一次更新的最新帧
+        :return: (帧序号, 帧, 采集时间戳)；超时或已停止返回 (0, None, 0.0)
+        """
+        deadline = time.perf_counter() + timeout
+        with self._cond:
+            while self._running and self._seq <= self._consumed_seq:
+                remaining = deadline - time.perf_counter()
+                if remaining <= 0:
+                    return 0, None, 0.0
+                self._cond.wait(remaining)
+            if self._seq <= self._consumed_seq:
+                return 0, None, 0.0
+            self._consumed_seq = self._seq
+            return self._seq, self._frame, self._timestamp
@@ -0,0 +1,121 @@
+#!/usr/bin/env python3
+import os
+import json
+import shutil
+
+def summarize_result(result):
+    """提取单帧推理结果摘要（检测框/置信度/类别、各掩码像素数），写入断点结果文件；多任务头结果合并"""
+    summary = {}
+    for sub_result in (result if isinstance(result, (list, tuple)) else [result]):
+        boxes = getattr(sub_result, "boxes", None)
+        if boxes is not None and len(boxes):
+            summary.setdefault("boxes", []).extend([[round(v, 1) for v in box] for box in boxes.xyxy.tolist()])
+            summary.setdefault("conf", []).extend([round(v, 4) for v in boxes.conf.tolist()])
+            summary.setdefault("cls", []).extend([int(v) for v in boxes.cls.tolist()])
+        masks = getattr(sub_result, "masks", None)
+        if masks is not None and masks.data is not None and len(masks.data):
+            summary.setdefault("mask_pixels", []).extend([int(v) for v in masks.data.flatten(1).gt(0).sum(1).tolist()])
+    return summary
+
+def source_identity(video_path, total_frames):
+    """源视频标识（路径、大小、修改时间、帧数），用于判断续跑的中间结果是否仍属于同一视频"""
+    video_path = os.path.abspath(video_path)
+    stat = os.stat(video_path)
+    return {"path": video_path, "size": stat.st_size, "mtime": int(stat.st_mtime), "total_frames": int(total_frames)}
+
+class VideoCheckpoint:
+    """
+    视频任务断点：输出文件同名的 .ckpt 目录下保存
+    - state.json：源视频标识、下一个待处理帧、已完成分段列表、结果文件有效长度
+    - results.jsonl：逐帧推理结果摘要（仅已提交分段内的帧视为有效）
+    - segNNNN.*：已完成的输出分段
+    每个分段写完后原子更新 state.json，进程崩溃最多丢失一个未提交分段
+    """
+    def __init__(self, output_path, video_path, total_frames):
+        self.output_path = output_path
+        self.video_path = os.path.abspath(video_path)
+        self.total_frames = int(total_frames)
+        self.dir = os.path.splitext(output_path)[0] + ".ckpt"
+        self.state_path = os.path.join(self.dir, "state.json")
+        self.results_path = os.path.join(self.dir, "results.jsonl")
+        self.next_frame = 0
+        self.segments = []
+        self.results_offset = 0
+        self._results_file = None
+
+    def _source_identity(self):
+        return source_identity(self.video_path, self.total_frames)
+
+    def load(self):
+        """加载已有断点（源视频一致时），返回True表示可续跑；不一致或损坏则清空重来"""
+        if os.path.exists(self.state_path):
+            try:
+                with open(self.state_path, "r", encoding="utf-8") as f:
+                    state = json.load(f)
+                if state.get("source") == self._source_identity() and all(os.path.exists(p) for p in state["segments"]):
+                    self.next_frame = int(state["next_frame"])
+                    self.segments = list(state["segments"])
+                    self.results_offset = int(state["results_offset"])
+                    self._open_results()
+                    return self.next_frame > 0
+            except (OSError, ValueError, KeyError):
+                pass
+        shutil.rmtree(self.dir, ignore_errors=True)
+        os.makedirs(self.dir, exist_ok=True)
+        self.next_frame, self.segments, self.results_offset = 0, [], 0
+        self._open_results()
+        return False
+
+    def _open_results(self):
+        """打开结果文件并截断到最后一次提交的长度（丢弃未提交分段的结果）"""
+        mode = "r+" if os.path.exists(self.results_path) else "w"
+        self._results_file = open(self.results_path, mode, encoding="utf-8")
+        self._results_file.seek(self.results_offset)
+        self._results_file.truncate()
+
+    def next_segment_path(self, ext=".mp4"):
+        return os.path.join(self.dir, f"seg{len(self.segments):04d}{ext}")
+
+    def append_result(self, frame_index, summary):
+        self._results_file.write(json.dumps({"frame": frame_index, **summary}, ensure_ascii=False) + "\n")
+
+    def commit_segment(self, segment_path, next_frame):
+        """提交一个已关闭的分段：刷新结果文件并原子写入新状态"""
+        self._results_file.flush()
+        os.fsync(self._results_file.fileno())
+        self.segments.append(segment_path)
+        self.next_frame = int(next_frame)
+        self.results_offset = self._results_file.tell()
+        state = {
+            "source": self._source_identity(),
+            "next_frame": self.next_frame,
+            "segments": self.segments,
+            "results_offset": self.results_offset,
+        }
+        tmp_path = self.state_path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(state, f, ensure_ascii=False, indent=2)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, self.state_path)
+
+    def close(self):
+        if self._results_file:
+            self._results_file.close()
+            self._results_file = None
+
+    def finalize(self, concat_func):
+        """
+        任务完成：按顺序合并全部分段到最终输出，结果文件移动为 <输出名>.results.jsonl，删除断点目录
+        最终输出的扩展名与编码跟随分段（mp4v写入失败回退XVID时分段为 .avi），output_path 随之更新
+        :param concat_func: 合并函数 (分段列表, 输出路径, fourcc) -> bool
+        """
+        self.close()
+        ext = os.path.splitext(self.segments[0])[1] if self.segments else os.path.splitext(self.output_path)[1]
+        self.output_path = os.path.splitext(self.output_path)[0] + ext
+        fourcc = "XVID" if ext.lower() == ".avi" else "mp4v"
+        if not concat_func(self.segments, self.output_path, fourcc):
+            return False
+        shutil.move(self.results_path, os.path.splitext(self.output_path)[0] + ".results.jsonl")
+        shutil.rmtree(self.dir, ignore_errors=True)
+        return True
@@ -0,0 +1,175 @@
+#!/usr/bin/env python3
+"""
+无界面批处理入口：复用 ImagePredictor / VideoPredictor / CameraPredictor，不依赖Tk窗口
+示例：
+    python cli.py data/*.mp4 images_dir/ -o out --conf 0.4 --imgsz 640 --device cpu --workers 4
+    python cli.py --camera 0 --duration 60 -o out
+退出码：0=全部成功；1=存在失败项；2=参数错误/无可处理输入；130=被中断
+"""
+import os
+import glob
+import time
+import argparse
+from core.config import Config
+from core.backends import BACKENDS, load_backend
+
+IMAGE_EXTS = {".jpg", ".jpeg", ".png", ".bmp"}
+VIDEO_EXTS = {".mp4", ".avi", ".mov", ".mkv"}
+
+def logger(content):
+    """与GUI一致的带时间戳日志，立即刷新便于调度系统采集"""
+    print(f"[{time.strftime('%Y-%m-%d %H:%M:%S')}] {content}", flush=True)
+
+def collect_inputs(patterns):
+    """展开文件/通配符/目录为(类型, 路径)列表，去重并保持顺序"""
+    paths = []
+    for pattern in patterns:
+        if os.path.isdir(pattern):
+            for root, _, files in os.walk(pattern):
+                paths.extend(os.path.join(root, name) for name in sorted(files))
+        elif glob.has_magic(pattern):
+            paths.extend(sorted(glob.glob(pattern, recursive=True)))
+        else:
+            paths.append(pattern)
+
+    inputs = []
+    seen = set()
+    for path in paths:
+        abs_path = os.path.abspath(path)
+        if abs_path in seen:
+            continue
+        seen.add(abs_path)
+        ext = os.path.splitext(path)[1].lower()
+        if ext in IMAGE_EXTS:
+            inputs.append(("image", abs_path))
+        elif ext in VIDEO_EXTS:
+            inputs.append(("video", abs_path))
+        elif not os.path.isdir(path):
+            logger(f"⚠️ 跳过不支持的文件：{path}")
+    return inputs
+
+def build_parser():
+    parser = argparse.ArgumentParser(description="RMTPPAD 无界面批量预测")
+    parser.add_argument("inputs", nargs="*", help="图片/视频文件、通配符或目录")
+    parser.add_argument("-o", "--output", required=True, help="结果保存根目录（自动创建images/videos/camera子目录）")
+    parser.add_argument("--conf", type=float, default=Config.CONF_THRESHOLD, help="检测置信度（0.0~1.0）")
+    parser.add_argument("--imgsz", type=int, default=Config.IMGSZ, help="推理尺寸")
+    parser.add_argument("--device", default=None, help="推理设备（默认自动：优先GPU）")
+    parser.add_argument("--backend", default=Config.INFERENCE_BACKEND, choices=BACKENDS, help="推理后端（onnx/INT8首次运行时导出并缓存到权重旁）")
+    parser.add_argument("--calibration", default=None, help="INT8静态量化的校准样本图片目录")
+    parser.add_argument("--workers", type=int, default=Config.VIDEO_SHARD_WORKERS, help="单个视频的分片进程数（0/1=单进程）")
+    parser.add_argument("--torch-threads", type=int, default=Config.TORCH_INTRA_OP_THREADS, help="torch算子内线程数（0=默认）")
+    parser.add_argument("--cv2-threads", type=int, default=Config.CV2_THREADS, help="OpenCV内部线程数（-1=默认）")
+    parser.add_argument("--batch", type=int, default=Config.VIDEO_BATCH_SIZE, help="视频批量推理帧数")
+    parser.add_argument("--pacing", default="max", choices=["realtime", "max", "target-fps"], help="视频输出节奏（默认不限速）")
+    parser.add_argument("--target-fps", type=float, default=Config.VIDEO_TARGET_FPS, help="target-fps模式的目标帧率")
+    parser.add_argument("--checkpoint-interval", type=int, default=Config.VIDEO_CHECKPOINT_INTERVAL, help="视频断点间隔帧数（>0时可中断后续跑，0=关闭）")
+    parser.add_argument("--camera", default=None, help="摄像头ID（指定后执行摄像头预测）；也可为视频文件路径或 synthetic[:宽x高]（虚拟摄像头）")
+    parser.add_argument("--duration", type=float, default=0, help="摄像头预测时长（秒，0=直到Ctrl+C）")
+    parser.add_argument("--stage-timing", action="store_true", default=Config.STAGE_TIMING, help="记录分阶段耗时并导出 .timing.json 直方图")
+    parser.add_argument("--trace", default=Config.TRACE_PATH, help="线程时间线输出路径（Chrome trace/Perfetto JSON）")
+    parser.add_argument("--latency-slo", type=float, default=Config.CAMERA_LATENCY_SLO_MS, help="摄像头延迟目标（毫秒，超出时自动降分辨率/跳帧，0=关闭）")
+    return parser
+
+def apply_config(args):
+    """命令行参数写入全局配置，供各预测器读取"""
+    Config.CONF_THRESHOLD = args.conf
+    Config.IMGSZ = args.imgsz
+    Config.INFERENCE_BACKEND = args.backend
+    Config.TORCH_INTRA_OP_THREADS = args.torch_threads
+    Config.CV2_THREADS = args.cv2_threads
+    if args.calibration:
+        Config.QUANT_CALIBRATION_DIR = args.calibration
+    if args.device is not None:
+        Config.DEVICE = int(args.device) if args.device.isdigit() else args.device
+    Config.VIDEO_SHARD_WORKERS = args.workers
+    Config.VIDEO_BATCH_SIZE = args.batch
+    Config.VIDEO_CHECKPOINT_INTERVAL = args.checkpoint_interval
+    Config.CAMERA_LATENCY_SLO_MS = args.latency_slo
+    Config.STAGE_TIMING = args.stage_timing
+    Config.TRACE_PATH = args.trace
+
+def run_image(model, path, output_root):
+    from core.predictors import ImagePredictor
+    predictor = ImagePredictor(model, None, logger)
+    predictor.set_save_dir(output_root)
+    start = time.perf_counter()
+    predictor.start(path)
+    logger(f"⏱️ 图片耗时 {time.perf_counter() - start:.2f}s：{path}")
+    return predictor.succeeded
+
+def run_video(model, path, output_root, args):
+    from core.predictors import VideoPredictor
+    predictor = VideoPredictor(model, None, logger, None)
+    predictor.set_save_dir(output_root)
+    predictor.set_pacing(args.pacing, args.target_fps if args.pacing == "target-fps" else None)
+    start = time.perf_counter()
+    predictor.start(path)
+    try:
+        ok = predictor.wait()
+    except KeyboardInterrupt:
+        predictor.stop()
+        raise
+    elapsed = time.perf_counter() - start
+    fps = predictor.processed_frames / elapsed if elapsed > 0 else 0.0
+    logger(f"⏱️ 视频耗时 {elapsed:.1f}s，{predictor.processed_frames} 帧，吞吐 {fps:.2f} fps：{path}")
+    return ok
+
+def run_camera(model, camera_id, output_root, duration):
+    from core.predictors import CameraPredictor
+    predictor = CameraPredictor(model, None, logger)
+    predictor.set_save_dir(output_root)
+    predictor.start(camera_id)
+    if not predictor.is_running:
+        return False
+    start = time.perf_counter()
+    try:
+        while predictor.is_running and (duration <= 0 or time.perf_counter() - start < duration):
+            time.sleep(0.2)
+    finally:
+        predictor.stop()
+    elapsed = time.perf_counter() - start
+    logger(f"⏱️ 摄像头运行 {elapsed:.1f}s，{predictor.frame_index} 帧，吞吐 {predictor.frame_index / max(elapsed, 1e-6):.2f} fps")
+    return predictor.succeeded
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    inputs = collect_inputs(args.inputs)
+    if not inputs and args.camera is None:
+        logger("❌ 没有可处理的输入（支持图片、视频、通配符和目录，或使用 --camera）")
+        return 2
+    if not (0.0 <= args.conf <= 1.0):
+        logger(f"❌ 置信度需在0.0~1.0之间：{args.conf}")
+        return 2
+
+    apply_config(args)
+    from core.runtime import apply_runtime_config
+    apply_runtime_config(logger)
+    output_root = os.path.abspath(args.output)
+    os.makedirs(output_root, exist_ok=True)
+
+    try:
+        model = load_backend(Config.INFERENCE_BACKEND, Config.MODEL_WEIGHT_PATH, logger=logger)
+        logger(f"✅ 模型加载完成（推理后端：{model.name}）")
+    except Exception as e:
+        logger(f"❌ 模型加载失败：{str(e)}")
+        return 1
+
+    failures = []
+    try:
+        for i, (kind, path) in enumerate(inputs, 1):
+            logger(f"🚀 [{i}/{len(inputs)}] 开始{'图片' if kind == 'image' else '视频'}预测：{path}")
+            ok = run_image(model, path, output_root) if kind == "image" else run_video(model, path, output_root, args)
+            if not ok:
+                failures.append(path)
+        if args.camera is not None and not run_camera(model, args.camera, output_root, args.duration):
+            failures.append(f"camera:{args.camera}")
+    except KeyboardInterrupt:
+        logger("🛑 已中断")
+        return 130
+
+    total = len(inputs) + (1 if args.camera is not None else 0)
+    logger(f"📊 完成 {total - len(failures)}/{total} 项，失败 {len(failures)} 项")
+    for path in failures:
+        logger(f"❌ 失败：{path}")
+    return 1 if failures else 0
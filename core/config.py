@@ -1,69 +1,149 @@
-#!/usr/bin/env python3
-import os
-import sys
-
-def get_base_dir():
-    """
-    获取基准目录（无兜底：仅返回明确的运行环境目录，不做异常兜底）
-    1. EXE打包运行：返回EXE所在目录
-    2. 普通Python运行：返回项目根目录
-    """
-    if getattr(sys, 'frozen', False):
-        # EXE打包环境：直接返回EXE所在目录（无异常兜底，明确依赖环境配置）
-        exe_dir = os.path.dirname(os.path.abspath(sys.executable))
-        return os.path.abspath(exe_dir)
-    else:
-        # 普通Python环境：直接返回项目根目录（无异常兜底，明确目录结构）
-        current_file = os.path.abspath(__file__)
-        project_parent = os.path.dirname(current_file)
-        project_root = os.path.dirname(project_parent)
-        return os.path.abspath(project_root)
-
-# 全局基准目录（无兜底：直接基于明确逻辑构建，不做额外容错）
-BASE_DIR = get_base_dir()
-
-# 兼容PyInstaller单文件模式的临时目录（无兜底：直接映射BASE_DIR，不做额外 fallback）
-MEIPASS_DIR = getattr(sys, '_MEIPASS', BASE_DIR)
-
-class Config:
-    """全局配置（无兜底：仅保留明确配置，移除所有容错和 fallback 逻辑）"""
-    # 模块路径：明确基于临时目录构建，无额外兜底，依赖打包/目录结构的正确性
-    MTDETR_PATH = os.path.join(MEIPASS_DIR, "ultralytics", "models", "mtdetr")
-    ULTRALYTICS_ROOT = os.path.join(MEIPASS_DIR, "ultralytics")
-    
-    # 模型权重路径（无兜底：仅保留最高优先级，移除「找不到则回退」的兜底逻辑）
-    # 明确依赖：PyInstaller临时目录/基准目录下的 ultralytics/best.pt 必须存在
-    MODEL_WEIGHT_PATH = os.path.join(MEIPASS_DIR, "ultralytics", "best.pt")
-    
-    # 结果保存路径：明确基于基准目录构建，无兜底，直接创建 runs 及其子目录
-    SAVE_ROOT = os.path.join(BASE_DIR, "runs")
-    IMAGE_SAVE_ROOT = os.path.join(SAVE_ROOT, "images")
-    VIDEO_SAVE_ROOT = os.path.join(SAVE_ROOT, "videos")
-    CAMERA_SAVE_ROOT = os.path.join(SAVE_ROOT, "camera")
-    
-    # 预测参数：明确配置，无动态兜底
-    IMGSZ = 640
-    CONF_THRESHOLD = 0.4
-    
-    @classmethod
-    def init_dirs(cls):
-        """初始化所有保存目录（无兜底：移除所有 try/except 异常兜底，直接创建）"""
-        dirs_to_create = [
-            cls.SAVE_ROOT,
-            cls.IMAGE_SAVE_ROOT,
-            cls.VIDEO_SAVE_ROOT,
-            cls.CAMERA_SAVE_ROOT
-        ]
-        
-        # 无异常兜底：直接创建目录，依赖目录权限和路径的正确性
-        os.makedirs(cls.SAVE_ROOT, exist_ok=True)
-        for dir_path in dirs_to_create:
-            os.makedirs(dir_path, exist_ok=True)
-        
-        return None
-    
-    @classmethod
-    def check_model_exists(cls):
-        """检查模型文件是否存在（无兜底：仅保留明确验证，移除冗余容错）"""
-        # 无兜底：直接验证路径有效性和文件类型，不做额外空值容错（依赖配置的正确性）
+#!/usr/bin/env python3
+import os
+import sys
+
+def get_base_dir():
+    """
+    获取基准目录（无兜底：仅返回明确的运行环境目录，不做异常兜底）
+    1. EXE打包运行：返回EXE所在目录
+    2. 普通Python运行：返回项目根目录
+    """
+    if getattr(sys, 'frozen', False):
+        # EXE打包环境：直接返回EXE所在目录（无异常兜底，明确依赖环境配置）
+        exe_dir = os.path.dirname(os.path.abspath(sys.executable))
+        return os.path.abspath(exe_dir)
+    else:
+        # 普通Python环境：直接返回项目根目录（无异常兜底，明确目录结构）
+        current_file = os.path.abspath(__file__)
+        project_parent = os.path.dirname(current_file)
+        project_root = os.path.dirname(project_parent)
+        return os.path.abspath(project_root)
+
+# 全局基准目录（无兜底：直接基于明确逻辑构建，不做额外容错）
+BASE_DIR = get_base_dir()
+
+# 兼容PyInstaller单文件模式的临时目录（无兜底：直接映射BASE_DIR，不做额外 fallback）
+MEIPASS_DIR = getattr(sys, '_MEIPASS', BASE_DIR)
+
+class Config:
+    """全局配置（无兜底：仅保留明确配置，移除所有容错和 fallback 逻辑）"""
+    # 模块路径：明确基于临时目录构建，无额外兜底，依赖打包/目录结构的正确性
+    MTDETR_PATH = os.path.join(MEIPASS_DIR, "ultralytics", "models", "mtdetr")
+    ULTRALYTICS_ROOT = os.path.join(MEIPASS_DIR, "ultralytics")
+    
+    # 模型权重路径（无兜底：仅保留最高优先级，移除「找不到则回退」的兜底逻辑）
+    # 明确依赖：PyInstaller临时目录/基准目录下的 ultralytics/best.pt 必须存在
+    MODEL_WEIGHT_PATH = os.path.join(MEIPASS_DIR, "ultralytics", "best.pt")
+    
+    # 结果保存路径：明确基于基准目录构建，无兜底，直接创建 runs 及其子目录
+    SAVE_ROOT = os.path.join(BASE_DIR, "runs")
+    IMAGE_SAVE_ROOT = os.path.join(SAVE_ROOT, "images")
+    VIDEO_SAVE_ROOT = os.path.join(SAVE_ROOT, "videos")
+    CAMERA_SAVE_ROOT = os.path.join(SAVE_ROOT, "camera")
+    
+    # 推理后端：torch（MTDETR .pt）/ torch-optimized（加载时Conv-BN融合+channels_last+torch.compile，不支持时自动回退）/
+    # onnx（首次导出缓存到权重旁的 .onnx，由onnxruntime执行）/
+    # onnx-int8-dynamic、onnx-int8-static（在 .onnx 基础上INT8量化并缓存；static 从校准目录取前N张样本帧统计激活范围）
+    INFERENCE_BACKEND = "torch"
+    QUANT_CALIBRATION_DIR = None
+    QUANT_CALIBRATION_FRAMES = 64
+    ENGINE_BENCH_RUNS = 3  # torch-optimized 启动时测量加速比的推理次数
+
+    # 预测参数：明确配置，无动态兜底
+    IMGSZ = 640
+    CONF_THRESHOLD = 0.4
+    DEVICE = None  # 推理设备：None=自动（优先GPU），也可指定 "cpu" / 0 / "cuda:1" 等
+
+    # 逐帧落盘开关：False=内存中直接由推理结果绘制标注帧（默认，无临时文件）；
+    # True=沿用旧的 save=True→frames目录→cv2.imread 读回模式（仅用于排查绘制差异）
+    SAVE_TEMP_FRAMES = False
+
+    # 视频批量推理：每次送入模型的帧数（1=逐帧；CPU多核时适当增大可摊薄单次调用开销）
+    VIDEO_BATCH_SIZE = 1
+
+    # 视频流水线（解码→推理→渲染→编码）阶段间队列长度（单位：批），满则上游阻塞
+    PIPELINE_QUEUE_SIZE = 4
+
+    # 视频输出节奏："realtime"=每帧按原帧率休眠（默认）；"max"=不限速（离线批处理）；
+    # "target-fps"=按 VIDEO_TARGET_FPS 以单调时钟漂移校正定速
+    VIDEO_PACING = "realtime"
+    VIDEO_TARGET_FPS = 30.0
+
+    # 进程分片：>1 时将单个视频按帧区间切分给多个子进程（各自加载模型）并行推理，0/1=关闭
+    VIDEO_SHARD_WORKERS = 0
+    # 每个分片进程的torch线程数（0=按 CPU核数/进程数 自动分配，避免超订）
+    SHARD_THREADS_PER_WORKER = 0
+
+    # 线程与CPU亲和性（core.runtime 在模型加载前应用）：torch算子内/算子间线程数（0=torch默认）、
+    # OpenCV内部线程数（-1=默认，0=关闭内部并行；分片推理时按进程数均分，默认时每进程1线程）；CPU_AFFINITY 按线程角色绑定CPU（仅Linux），
+    # 角色：decode/infer/render/encode（视频流水线）、player（左侧播放）、replay（右侧回放）、capture（摄像头采集），
+    # 例如 {"infer": "0-3", "decode": "4", "encode": "5", "player": "6"}，未列出的角色不绑定
+    TORCH_INTRA_OP_THREADS = 0
+    TORCH_INTEROP_THREADS = 0
+    CV2_THREADS = -1
+    CPU_AFFINITY = {}
+
+    # 断点续跑：每处理N帧关闭一个输出分段并提交断点（已完成帧索引+逐帧结果+分段列表），0=关闭
+    # 重启同一视频任务时从最后提交的帧继续，完成后合并分段为最终视频
+    VIDEO_CHECKPOINT_INTERVAL = 0
+
+    # 逐帧信息环形缓冲容量：仅保留最近N帧，保证长视频/7×24摄像头运行内存有界
+    FRAME_INFO_CAP = 1000
+
+    # 预览最大刷新频率（Hz）：预览只显示各侧最新帧，超出频率的中间帧直接丢弃
+    PREVIEW_MAX_HZ = 30
+    # 预览缩放质量："fast"=cv2 INTER_AREA（默认，开销低）；"high"=PIL LANCZOS（画质最好）
+    PREVIEW_QUALITY = "fast"
+
+    # 右侧回放内存缓存上限（MB，0=关闭）：推理时缓存预览尺寸的结果帧，完成后循环回放不再重新解码输出视频；
+    # 超出上限时放弃缓存，回放退回磁盘读取。COMPRESS=True 时以JPEG压缩存放
+    REPLAY_CACHE_MB = 256
+    REPLAY_CACHE_COMPRESS = True
+
+    # 摄像头延迟统计：每个延迟区间保留的最近样本数（百分位基于这些样本）；停止时摘要写入 <结果视频名>.latency.json
+    LATENCY_MAX_SAMPLES = 100000
+
+    # 摄像头延迟SLO（毫秒，0=关闭）：采集→编码延迟的p95超出目标时依次降推理分辨率、关闭掩码绘制、跳帧，
+    # 余量恢复后逐级回到全质量（分辨率阶梯从IMGSZ开始，取SLO_IMGSZ_STEPS中更小的档位）
+    CAMERA_LATENCY_SLO_MS = 0
+    SLO_IMGSZ_STEPS = (512, 384)
+    SLO_MAX_SKIP = 2
+
+    # 虚拟摄像头（摄像头ID填视频文件路径或 synthetic[:宽x高] 时生效）：输出帧率（0=视频原帧率）、
+    # 每帧随机抖动上限（毫秒）、丢帧概率与每次连续丢帧数
+    VIRTUAL_CAMERA_FPS = 0
+    VIRTUAL_CAMERA_JITTER_MS = 0.0
+    VIRTUAL_CAMERA_DROP_RATE = 0.0
+    VIRTUAL_CAMERA_DROP_BURST = 1
+
+    # 分阶段计时（decode/preprocess/inference/postprocess/render/encode/preview）：开启后每次运行结束
+    # 在结果文件旁写出 <结果名>.timing.json（各阶段直方图）；关闭时计时调用为空操作
+    STAGE_TIMING = False
+
+    # 线程时间线追踪（Trace Event Format JSON路径，None=关闭）：记录各线程/阶段/帧的耗时与
+    # BasePredictor.lock、IndependentVideoPlayer.lock 的等待与持有，可在 ui.perfetto.dev 查看；事件数上限防止内存增长
+    TRACE_PATH = None
+    TRACE_MAX_EVENTS = 1_000_000
+
+    @classmethod
+    def init_dirs(cls):
+        """初始化所有保存目录（无兜底：移除所有 try/except 异常兜底，直接创建）"""
+        dirs_to_create = [
+            cls.SAVE_ROOT,
+            cls.IMAGE_SAVE_ROOT,
+            cls.VIDEO_SAVE_ROOT,
+            cls.CAMERA_SAVE_ROOT
+        ]
+        
+        # 无异常兜底：直接创建目录，依赖目录权限和路径的正确性
+        os.makedirs(cls.SAVE_ROOT, exist_ok=True)
+        for dir_path in dirs_to_create:
+            os.makedirs(dir_path, exist_ok=True)
+        
+        return None
+    
+    @classmethod
+    def check_model_exists(cls):
+        """检查模型文件是否存在（无兜底：仅保留明确验证，移除冗余容错）"""
+        # 无兜底：直接验证路径有效性和文件类型，不做额外空值容错（依赖配置的正确性）
         return os.path.exists(cls.MODEL_WEIGHT_PATH) and os.path.isfile(cls.MODEL_WEIGHT_PATH)
\ No newline at end of file
@@ -0,0 +1,167 @@
+#!/usr/bin/env python3
+import os
+import json
+import time
+import numpy as np
+import torch
+from core.config import Config
+
+def _default_device():
+    return Config.DEVICE if Config.DEVICE is not None else (0 if torch.cuda.is_available() else "cpu")
+
+def engine_cache_paths(weight_path):
+    """优化引擎缓存：决策记录 best.engine.json + torch.compile(inductor) 编译缓存目录 best.torch_cache/"""
+    stem = os.path.splitext(weight_path)[0]
+    return stem + ".engine.json", stem + ".torch_cache"
+
+class OptimizedTorchEngine:
+    """
+    PyTorch优化推理引擎（加载时应用，对预测器透明）：
+    1. Conv-BN融合（model.fuse()）；ultralytics predict 首次调用时已自动融合的模型不再重复融合，也不计入加速
+    2. channels_last 内存布局：权重转换 + forward前置钩子把输入张量转换为 channels_last
+    3. torch.compile 图编译（inductor），编译缓存写到权重旁，重启后复用
+    4. predict() 在 torch.inference_mode() 下执行
+    任一步骤不受支持（算子/平台/版本）时跳过该步骤；编译失败的结论按 torch版本+设备 记录，之后不再尝试；
+    优化后反而变慢时恢复原始执行方式。启动时实测并报告加速比
+    """
+    def __init__(self, mtdetr, weight_path, logger=print, bench_runs=3):
+        self.mtdetr = mtdetr
+        self.weight_path = weight_path
+        self.logger = logger
+        self.bench_runs = max(1, int(bench_runs))
+        self.device = _default_device()
+        self.applied = []
+        self.speedup = None
+        self._module = None
+        self._original_forward = None
+        self._layout_hook = None
+        self._decision_path, self._cache_dir = engine_cache_paths(weight_path)
+
+    def _inner_module(self):
+        inner = getattr(self.mtdetr, "model", None)
+        return inner if isinstance(inner, torch.nn.Module) else None
+
+    def _bench(self):
+        """合成帧预热1次后计时，返回每次predict平均毫秒"""
+        frame = np.random.default_rng(0).integers(0, 256, (Config.IMGSZ, Config.IMGSZ, 3), dtype=np.uint8)
+        kwargs = dict(source=[frame], save=False, device=self.device, imgsz=Config.IMGSZ,
+                      conf=Config.CONF_THRESHOLD, verbose=False)
+        with torch.inference_mode():
+            self.mtdetr.predict(**kwargs)
+            start = time.perf_counter()
+            for _ in range(self.bench_runs):
+                self.mtdetr.predict(**kwargs)
+        return (time.perf_counter() - start) / self.bench_runs * 1000
+
+    def _load_decision(self):
+        try:
+            with open(self._decision_path, "r", encoding="utf-8") as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+    def _save_decision(self, decision):
+        try:
+            with open(self._decision_path, "w", encoding="utf-8") as f:
+                json.dump(decision, f, ensure_ascii=False, indent=2)
+        except OSError as e:
+            self.logger(f"⚠️ 优化引擎缓存写入失败：{str(e)}")
+
+    def _try_fuse(self, module):
+        is_fused = getattr(module, "is_fused", None)
+        if callable(is_fused) and is_fused():
+            self.logger("ℹ️ 模型已由ultralytics预测流程融合Conv-BN（已计入基线），跳过")
+            return
+        try:
+            self.mtdetr.fuse()
+            self.applied.append("fuse")
+        except Exception as e:
+            self.logger(f"ℹ️ Conv-BN融合不可用，跳过：{str(e)}")
+
+    @staticmethod
+    def _to_channels_last(module, args):
+        """forward前置钩子：4维输入张量转换为 channels_last，与权重布局一致"""
+        if args and isinstance(args[0], torch.Tensor) and args[0].dim() == 4:
+            return (args[0].contiguous(memory_format=torch.channels_last),) + tuple(args[1:])
+        return None
+
+    def _try_channels_last(self, module):
+        try:
+            module.to(memory_format=torch.channels_last)
+            self._layout_hook = module.register_forward_pre_hook(self._to_channels_last)
+            self.applied.append("channels_last")
+        except Exception as e:
+            self.logger(f"ℹ️ channels_last不可用，跳过：{str(e)}")
+
+    def _try_compile(self, module, decision_key, decision):
+        if not hasattr(torch, "compile"):
+            self.logger("ℹ️ 当前torch版本不支持torch.compile，跳过")
+            return
+        if decision.get(decision_key) is False:
+            self.logger("ℹ️ 此前在本机torch.compile失败，跳过编译")
+            return
+        os.makedirs(self._cache_dir, exist_ok=True)
+        os.environ.setdefault("TORCHINDUCTOR_CACHE_DIR", self._cache_dir)
+        os.environ.setdefault("TORCHINDUCTOR_FX_GRAPH_CACHE", "1")
+        self._original_forward = module.forward
+        try:
+            module.forward = torch.compile(module.forward, dynamic=True)
+            self._bench()  # 编译在首次调用时发生，失败在此暴露
+            self.applied.append("compile")
+            decision[decision_key] = True
+        except Exception as e:
+            module.forward = self._original_forward
+            self._original_forward = None
+            decision[decision_key] = False
+            self.logger(f"ℹ️ torch.compile失败，回退到eager执行：{str(e).splitlines()[0] if str(e) else type(e).__name__}")
+
+    def _revert(self, module):
+        """优化后变慢：恢复eager与连续内存布局（融合不影响结果与速度，保留）"""
+        if self._original_forward is not None:
+            module.forward = self._original_forward
+            self._original_forward = None
+        if self._layout_hook is not None:
+            self._layout_hook.remove()
+            self._layout_hook = None
+        try:
+            module.to(memory_format=torch.contiguous_format)
+        except Exception:
+            pass
+        self.applied = [step for step in self.applied if step == "fuse"]
+
+    def apply(self):
+        """应用全部优化并实测加速比，返回self"""
+        module = self._inner_module()
+        if module is None:
+            self.logger("ℹ️ 模型不含可优化的torch模块，使用原始执行方式")
+            return self
+        baseline_ms = self._bench()
+        decision = self._load_decision()
+        decision_key = f"compile:{torch.__version__}:{self.device}"
+
+        self._try_fuse(module)
+        self._try_channels_last(module)
+        self._try_compile(module, decision_key, decision)
+        optimized_ms = self._bench()
+
+        if optimized_ms > baseline_ms and any(step != "fuse" for step in self.applied):
+            self._revert(module)
+            optimized_ms = self._bench()
+            self.logger("ℹ️ 优化后反而变慢，已恢复eager执行（保留Conv-BN融合）")
+        self.speedup = baseline_ms / optimized_ms if optimized_ms > 0 else None
+        decision["last_report"] = {
+            "device": str(self.device), "imgsz": Config.IMGSZ, "applied": self.applied,
+            "baseline_ms": round(baseline_ms, 2), "optimized_ms": round(optimized_ms, 2),
+            "speedup": round(self.speedup, 2) if self.speedup else None,
+        }
+        self._save_decision(decision)
+        self.logger(
+            f"⚡ 优化推理引擎：{'、'.join(self.applied) or '无可用优化'}；"
+            f"单帧 {baseline_ms:.1f}ms → {optimized_ms:.1f}ms"
+            + (f"（加速 {self.speedup:.2f}×）" if self.speedup else "")
+        )
+        return self
+
+    def predict(self, source, **kwargs):
+        with torch.inference_mode():
+            return self.mtdetr.predict(source=source, **kwargs)
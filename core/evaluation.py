@@ -0,0 +1,150 @@
+#!/usr/bin/env python3
+import os
+import cv2
+import numpy as np
+
+def extract_detections(result):
+    """
+    从单帧推理结果提取各任务头的检测：[{"boxes": (N,4) xyxy, "conf": (N,), "cls": (N,), "masks": (N,H,W)布尔或None}]
+    多任务头结果（列表）按头顺序返回多项，单头返回一项
+    """
+    heads = result if isinstance(result, (list, tuple)) else [result]
+    extracted = []
+    for head in heads:
+        boxes = getattr(head, "boxes", None)
+        masks = getattr(head, "masks", None)
+        if boxes is not None and len(boxes):
+            xyxy = boxes.xyxy.cpu().numpy().astype(np.float32)
+            conf = boxes.conf.cpu().numpy().astype(np.float32)
+            cls = boxes.cls.cpu().numpy().astype(np.int64)
+        else:
+            xyxy = np.zeros((0, 4), dtype=np.float32)
+            conf = np.zeros((0,), dtype=np.float32)
+            cls = np.zeros((0,), dtype=np.int64)
+        mask_data = masks.data.cpu().numpy() > 0.5 if masks is not None and masks.data is not None else None
+        extracted.append({"boxes": xyxy, "conf": conf, "cls": cls, "masks": mask_data})
+    return extracted
+
+def box_iou(a, b):
+    """两组xyxy框的IoU矩阵 (len(a), len(b))"""
+    if len(a) == 0 or len(b) == 0:
+        return np.zeros((len(a), len(b)), dtype=np.float32)
+    lt = np.maximum(a[:, None, :2], b[None, :, :2])
+    rb = np.minimum(a[:, None, 2:], b[None, :, 2:])
+    inter = np.clip(rb - lt, 0, None).prod(axis=2)
+    area_a = (a[:, 2] - a[:, 0]) * (a[:, 3] - a[:, 1])
+    area_b = (b[:, 2] - b[:, 0]) * (b[:, 3] - b[:, 1])
+    return inter / np.maximum(area_a[:, None] + area_b[None, :] - inter, 1e-9)
+
+def union_mask(masks):
+    """合并一帧所有实例掩码（语义层面比较，如车道线/可行驶区域）"""
+    if masks is None or len(masks) == 0:
+        return None
+    return np.any(masks, axis=0)
+
+def mask_iou(reference, candidate):
+    """两帧合并掩码的IoU；两者都为空时为1，只有一方为空时为0（尺寸不一致时按参考尺寸最近邻缩放）"""
+    if reference is None and candidate is None:
+        return 1.0
+    if reference is None or candidate is None:
+        return 0.0
+    if reference.shape != candidate.shape:
+        candidate = cv2.resize(candidate.astype(np.uint8), (reference.shape[1], reference.shape[0]),
+                               interpolation=cv2.INTER_NEAREST).astype(bool)
+    union = np.logical_or(reference, candidate).sum()
+    if union == 0:
+        return 1.0
+    return float(np.logical_and(reference, candidate).sum() / union)
+
+def average_precision(recall, precision):
+    """VOC风格全点插值AP"""
+    mrec = np.concatenate(([0.0], recall, [1.0]))
+    mpre = np.concatenate(([1.0], precision, [0.0]))
+    mpre = np.flip(np.maximum.accumulate(np.flip(mpre)))
+    idx = np.where(mrec[1:] != mrec[:-1])[0]
+    return float(np.sum((mrec[idx + 1] - mrec[idx]) * mpre[idx + 1]))
+
+def pseudo_map(references, candidates, iou_thresholds=np.arange(0.5, 0.96, 0.05)):
+    """
+    以参考后端（如float32 PyTorch）的检测作为伪真值，计算候选后端的 mAP@0.5 与 mAP@0.5:0.95
+    references / candidates：逐帧的 {"boxes","conf","cls"} 列表（同一任务头）
+    """
+    classes = sorted({int(c) for ref in references for c in ref["cls"]})
+    if not classes:
+        return {"map50": None, "map50_95": None}
+    aps = np.zeros((len(iou_thresholds), len(classes)))
+    for ci, cls in enumerate(classes):
+        n_gt = sum(int((ref["cls"] == cls).sum()) for ref in references)
+        scores, hits = [], [[] for _ in iou_thresholds]
+        for ref, cand in zip(references, candidates):
+            gt = ref["boxes"][ref["cls"] == cls]
+            keep = cand["cls"] == cls
+            boxes, conf = cand["boxes"][keep], cand["conf"][keep]
+            order = np.argsort(-conf)
+            boxes, conf = boxes[order], conf[order]
+            ious = box_iou(boxes, gt)
+            for ti, thr in enumerate(iou_thresholds):
+                matched = np.zeros(len(gt), dtype=bool)
+                for di in range(len(boxes)):
+                    hit = False
+                    if len(gt):
+                        candidates_iou = np.where(matched, -1.0, ious[di])
+                        best = int(np.argmax(candidates_iou))
+                        if candidates_iou[best] >= thr:
+                            matched[best] = True
+                            hit = True
+                    hits[ti].append(hit)
+            scores.extend(conf.tolist())
+        if not scores:
+            continue
+        order = np.argsort(-np.asarray(scores))
+        for ti in range(len(iou_thresholds)):
+            tp = np.asarray(hits[ti], dtype=np.float64)[order]
+            tp_cum = np.cumsum(tp)
+            fp_cum = np.cumsum(1.0 - tp)
+            recall = tp_cum / max(n_gt, 1)
+            precision = tp_cum / np.maximum(tp_cum + fp_cum, 1e-9)
+            aps[ti, ci] = average_precision(recall, precision)
+    return {"map50": float(aps[0].mean()), "map50_95": float(aps.mean())}
+
+def compare_backends(reference_results, candidate_results):
+    """
+    对比两个后端在同一批帧上的输出（逐帧结果列表），按任务头汇总：
+    检测伪mAP（以参考为真值）、平均合并掩码IoU、检测数量差
+    """
+    per_head = {}
+    for ref_result, cand_result in zip(reference_results, candidate_results):
+        for head_index, (ref, cand) in enumerate(zip(extract_detections(ref_result), extract_detections(cand_result))):
+            head = per_head.setdefault(head_index, {"refs": [], "cands": [], "mask_ious": [], "count_diff": 0})
+            head["refs"].append(ref)
+            head["cands"].append(cand)
+            head["count_diff"] += abs(len(ref["boxes"]) - len(cand["boxes"]))
+            if ref["masks"] is not None or cand["masks"] is not None:
+                head["mask_ious"].append(mask_iou(union_mask(ref["masks"]), union_mask(cand["masks"])))
+    report = {}
+    for head_index, head in per_head.items():
+        entry = pseudo_map(head["refs"], head["cands"])
+        entry["mask_iou"] = float(np.mean(head["mask_ious"])) if head["mask_ious"] else None
+        entry["detections_ref"] = int(sum(len(r["boxes"]) for r in head["refs"]))
+        entry["detection_count_diff"] = head["count_diff"]
+        report[f"head{head_index}"] = entry
+    return report
+
+IMAGE_EXTS = (".jpg", ".jpeg", ".png", ".bmp")
+
+def load_sample_frames(path, limit=64):
+    """读取样本帧（BGR）：图片目录按文件名排序取前limit张；视频文件在全片均匀抽取limit帧"""
+    if os.path.isdir(path):
+        names = sorted(n for n in os.listdir(path) if n.lower().endswith(IMAGE_EXTS))[:limit]
+        frames = [cv2.imread(os.path.join(path, n)) for n in names]
+        return [f for f in frames if f is not None]
+    cap = cv2.VideoCapture(path)
+    total = int(cap.get(cv2.CAP_PROP_FRAME_COUNT))
+    frames = []
+    for index in np.linspace(0, max(total - 1, 0), num=min(limit, max(total, 1)), dtype=int):
+        cap.set(cv2.CAP_PROP_POS_FRAMES, int(index))
+        ret, frame = cap.read()
+        if ret:
+            frames.append(frame)
+    cap.release()
+    return frames
@@ -0,0 +1,53 @@
+#!/usr/bin/env python3
+import threading
+import cv2
+
+class SharedFrameSource:
+    """
+    共享视频帧源：同一视频只打开一个 cv2.VideoCapture、每帧只解码一次
+    - read()/get()/set()/isOpened()/release() 与 cv2.VideoCapture 接口一致，供推理流水线解码
+    - publish() 把正在输出的帧按引用分发给订阅者（如左侧原始预览），不复制
+    订阅者回调运行在发布线程中，应只做轻量操作（例如提交到预览调度器）
+    """
+    def __init__(self, video_path):
+        self.video_path = video_path
+        self.cap = cv2.VideoCapture(video_path)
+        self._subscribers = []
+        self._lock = threading.Lock()
+
+    def isOpened(self):
+        return self.cap is not None and self.cap.isOpened()
+
+    def read(self):
+        return self.cap.read()
+
+    def get(self, prop_id):
+        return self.cap.get(prop_id)
+
+    def set(self, prop_id, value):
+        return self.cap.set(prop_id, value)
+
+    def subscribe(self, callback):
+        """订阅帧：callback(帧索引, 原始帧)"""
+        with self._lock:
+            if callback not in self._subscribers:
+                self._subscribers.append(callback)
+
+    def unsubscribe(self, callback):
+        with self._lock:
+            if callback in self._subscribers:
+                self._subscribers.remove(callback)
+
+    def publish(self, frame_index, frame):
+        """按引用向所有订阅者分发帧（订阅者不得原地修改帧）"""
+        with self._lock:
+            subscribers = list(self._subscribers)
+        for callback in subscribers:
+            callback(frame_index, frame)
+
+    def release(self):
+        with self._lock:
+            self._subscribers.clear()
+        if self.cap is not None:
+            self.cap.release()
+            self.cap = None
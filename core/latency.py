@@ -0,0 +1,133 @@
+#!/usr/bin/env python3
+import json
+import threading
+from collections import deque
+
+# 单帧时间戳（time.perf_counter()，秒）；display 在Tk主线程中写入预览后记录
+STAMPS = ("capture", "infer_start", "infer_end", "render", "encode", "display")
+
+# 统计的延迟区间：名称 → (起点, 终点)
+SPANS = {
+    "queue": ("capture", "infer_start"),           # 采集后等待推理
+    "infer": ("infer_start", "infer_end"),
+    "render": ("infer_end", "render"),
+    "encode": ("render", "encode"),
+    "capture_to_encode": ("capture", "encode"),
+    "glass_to_glass": ("capture", "display"),      # 采集到上屏（端到端）
+}
+
+def percentile(sorted_values, q):
+    """线性插值百分位（sorted_values 已升序，q∈[0,100]）"""
+    if not sorted_values:
+        return None
+    pos = (len(sorted_values) - 1) * q / 100.0
+    lo = int(pos)
+    hi = min(lo + 1, len(sorted_values) - 1)
+    return sorted_values[lo] + (sorted_values[hi] - sorted_values[lo]) * (pos - lo)
+
+class FrameStamps:
+    """单帧时间戳记录：由采集→推理→绘制→编码→显示各阶段依次打点"""
+    __slots__ = ("seq", "times", "pending", "displayed")
+
+    def __init__(self, seq, capture_time):
+        self.seq = seq
+        self.times = {"capture": capture_time}
+        # 待完成的部分：推理线程（编码完成），提交预览后再加上Tk主线程（上屏或被丢弃），两者先后顺序不定
+        self.pending = 1
+        self.displayed = None
+
+    def mark(self, stage, timestamp):
+        self.times[stage] = timestamp
+
+class LatencyRecorder:
+    """
+    摄像头端到端延迟统计（线程安全）：
+    1. 每帧由 begin() 创建 FrameStamps，各阶段打点；推理线程 finish() 且预览回调已触发（上屏或丢弃，无预览时仅前者）后计入统计
+    2. 各区间保留最近 max_samples 个样本（毫秒），按需计算 p50/p95/p99，内存有界
+    3. 丢帧分两类：采集后未送入推理（由采集线程上报）、推理完成但预览来不及显示
+    """
+    def __init__(self, max_samples=100000):
+        self._lock = threading.Lock()
+        self._samples = {name: deque(maxlen=max_samples) for name in SPANS}
+        self.frames = 0
+        self.displayed = 0
+        self.display_dropped = 0
+        self.capture_dropped = 0
+
+    def reset(self):
+        with self._lock:
+            for samples in self._samples.values():
+                samples.clear()
+            self.frames = self.displayed = self.display_dropped = self.capture_dropped = 0
+
+    def begin(self, seq, capture_time):
+        """开始记录一帧（capture_time 为采集线程记录的 perf_counter 时间）"""
+        return FrameStamps(seq, capture_time)
+
+    def finish(self, stamps):
+        """推理线程处理完成（编码后或处理失败时调用）"""
+        self._release(stamps)
+
+    def display_callback(self, stamps):
+        """生成预览显示回调（该帧改为等待回调后才计入统计）：timestamp为上屏时间，None表示该帧被预览丢弃"""
+        with self._lock:
+            stamps.pending += 1
+
+        def on_display(timestamp):
+            if timestamp is not None:
+                stamps.mark("display", timestamp)
+            stamps.displayed = timestamp is not None
+            self._release(stamps)
+        return on_display
+
+    def _release(self, stamps):
+        with self._lock:
+            stamps.pending -= 1
+            if stamps.pending > 0:
+                return
+            self.frames += 1
+            if stamps.displayed is True:
+                self.displayed += 1
+            elif stamps.displayed is False:
+                self.display_dropped += 1
+            for name, (begin, end) in SPANS.items():
+                t0 = stamps.times.get(begin)
+                t1 = stamps.times.get(end)
+                if t0 is not None and t1 is not None:
+                    self._samples[name].append((t1 - t0) * 1000.0)
+
+    def set_capture_dropped(self, count):
+        with self._lock:
+            self.capture_dropped = int(count)
+
+    def summary(self):
+        """返回统计摘要：各区间 count/mean/p50/p95/p99/max（毫秒）与丢帧计数"""
+        with self._lock:
+            snapshot = {name: sorted(samples) for name, samples in self._samples.items()}
+            result = {
+                "frames": self.frames,
+                "displayed": self.displayed,
+                "dropped": {"capture": self.capture_dropped, "display": self.display_dropped},
+                "latency_ms": {},
+            }
+        for name, values in snapshot.items():
+            if not values:
+                continue
+            result["latency_ms"][name] = {
+                "count": len(values),
+                "mean": round(sum(values) / len(values), 3),
+                "p50": round(percentile(values, 50), 3),
+                "p95": round(percentile(values, 95), 3),
+                "p99": round(percentile(values, 99), 3),
+                "max": round(values[-1], 3),
+            }
+        return result
+
+    def write_summary(self, path, extra=None):
+        """写出JSON摘要文件，返回摘要字典"""
+        data = self.summary()
+        if extra:
+            data.update(extra)
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(data, f, ensure_ascii=False, indent=2)
+        return data
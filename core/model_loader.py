@@ -0,0 +1,20 @@
+#!/usr/bin/env python3
+import os
+import sys
+from core.config import Config
+
+def setup_import_paths():
+    """将内置ultralytics/MTDETR目录加入模块搜索路径（GUI、命令行、基准脚本共用）"""
+    for path in (Config.MTDETR_PATH, Config.ULTRALYTICS_ROOT):
+        if path not in sys.path:
+            sys.path.insert(0, path)
+    if "PYTHONPATH" in os.environ:
+        os.environ["PYTHONPATH"] = f"{Config.MTDETR_PATH};{Config.ULTRALYTICS_ROOT};{os.environ['PYTHONPATH']}"
+    else:
+        os.environ["PYTHONPATH"] = f"{Config.MTDETR_PATH};{Config.ULTRALYTICS_ROOT}"
+
+def load_mtdetr(weight_path=None):
+    """加载MTDETR模型（异常直接抛出，由调用方决定提示方式）"""
+    setup_import_paths()
+    from ultralytics import MTDETR
+    return MTDETR(weight_path or Config.MODEL_WEIGHT_PATH)
@@ -0,0 +1,47 @@
+#!/usr/bin/env python3
+import time
+
+class FramePacer:
+    """
+    帧输出节奏控制
+    - realtime：每帧后固定休眠 1/fps（与旧逻辑一致，推理耗时之外额外等待）
+    - max：不限速，按硬件最快速度处理（离线批处理）
+    - target-fps：基于单调时钟的绝对时间表定速，误差不累积（漂移校正）
+    catch_up=True 时落后不重新锚定，由调用方根据返回的迟到时长丢帧追赶（播放器使用）
+    """
+    MODES = ("realtime", "max", "target-fps")
+    MAX_CATCH_UP = 1.0  # 落后超过该秒数（如系统休眠）时仍重新锚定，避免连续大量丢帧
+
+    def __init__(self, mode="realtime", fps=30.0, catch_up=False):
+        if mode not in self.MODES:
+            raise ValueError(f"未知的节奏模式：{mode}（可选：{', '.join(self.MODES)}）")
+        self.mode = mode
+        self.fps = float(fps) if fps and fps > 0 else 30.0
+        self.period = 1.0 / self.fps
+        self.catch_up = catch_up
+        self._next_deadline = None
+
+    def reset(self):
+        """重置时间表（暂停恢复、循环重启后调用）"""
+        self._next_deadline = None
+
+    def wait(self):
+        """等待到下一帧的输出时刻，返回当前帧的迟到时长（秒，未迟到为0）"""
+        if self.mode == "max":
+            return 0.0
+        if self.mode == "realtime":
+            time.sleep(self.period)
+            return 0.0
+
+        now = time.monotonic()
+        if self._next_deadline is None:
+            self._next_deadline = now
+        lateness = now - self._next_deadline
+        if lateness < 0:
+            time.sleep(-lateness)
+            lateness = 0.0
+        elif lateness > (self.MAX_CATCH_UP if self.catch_up else self.period):
+            # 落后过多：以当前时刻重新锚定，避免恢复后连续突发输出
+            self._next_deadline = now
+        self._next_deadline += self.period
+        return lateness
@@ -0,0 +1,115 @@
+#!/usr/bin/env python3
+import queue
+import threading
+from core.tracing import TRACER
+from core.runtime import pin_current_thread
+
+class StagePipeline:
+    """
+    多阶段流水线：源（解码）与每个处理阶段各占一个线程，阶段间以有界队列连接
+    1. 队列满时上游阻塞（背压），内存占用上限 = 阶段数 × 队列长度
+    2. 每个阶段单线程按FIFO处理，输出顺序与源顺序一致
+    3. should_run() 返回False或任一阶段异常时，所有线程尽快退出
+    """
+    _END = object()  # 源耗尽标记，沿队列逐级下传
+
+    def __init__(self, source, stages, queue_size=4, should_run=None, logger=None):
+        """
+        :param source: 可迭代对象，在源线程中迭代产出数据
+        :param stages: [(阶段名, 处理函数)]，处理函数返回值送入下一阶段（返回None表示丢弃），最后一个阶段返回值忽略
+        :param queue_size: 阶段间队列长度
+        :param should_run: 运行开关回调，返回False时停止
+        """
+        self.source = source
+        self.stages = list(stages)
+        self.should_run = should_run or (lambda: True)
+        self.logger = logger
+        self.queues = [queue.Queue(maxsize=max(1, int(queue_size))) for _ in self.stages]
+        self.stop_event = threading.Event()
+        self.error = None
+        self.source_exhausted = False
+        self.threads = []
+
+    def _running(self):
+        return not self.stop_event.is_set() and self.should_run()
+
+    def _put(self, q, item):
+        """带停止检测的阻塞写入，停止时返回False"""
+        while self._running():
+            try:
+                q.put(item, timeout=0.05)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    def _get(self, q):
+        """带停止检测的阻塞读取，停止时返回_END"""
+        while self._running():
+            try:
+                return q.get(timeout=0.05)
+            except queue.Empty:
+                continue
+        return self._END
+
+    def _fail(self, stage_name, e):
+        """记录首个异常并通知所有线程退出"""
+        if self.error is None:
+            self.error = e
+            if self.logger:
+                self.logger(f"❌ 流水线阶段「{stage_name}」异常：{str(e)}")
+        self.stop_event.set()
+
+    def _source_loop(self):
+        pin_current_thread("decode")
+        try:
+            iterator = iter(self.source)
+            while True:
+                with TRACER.span("source", cat="pipeline"):
+                    item = next(iterator, self._END)
+                if item is self._END:
+                    break
+                if not self._put(self.queues[0], item):
+                    return
+            self.source_exhausted = True
+            self._put(self.queues[0], self._END)
+        except Exception as e:
+            self._fail("source", e)
+
+    def _stage_loop(self, stage_index):
+        name, func = self.stages[stage_index]
+        pin_current_thread(name)
+        in_queue = self.queues[stage_index]
+        out_queue = self.queues[stage_index + 1] if stage_index + 1 < len(self.stages) else None
+        try:
+            while True:
+                item = self._get(in_queue)
+                if item is self._END:
+                    if out_queue is not None:
+                        self._put(out_queue, self._END)
+                    return
+                with TRACER.span(name, cat="pipeline", items=len(item) if hasattr(item, "__len__") else 1):
+                    result = func(item)
+                if out_queue is not None and result is not None:
+                    if not self._put(out_queue, result):
+                        return
+        except Exception as e:
+            self._fail(name, e)
+
+    def run(self):
+        """阻塞运行直至源耗尽并处理完毕或被停止；阶段异常会重新抛出。返回True表示全部数据处理完毕"""
+        self.threads = [threading.Thread(target=self._source_loop, name="pipeline-source", daemon=True)]
+        for i, (name, _) in enumerate(self.stages):
+            self.threads.append(threading.Thread(target=self._stage_loop, args=(i,), name=f"pipeline-{name}", daemon=True))
+        for t in self.threads:
+            t.start()
+        for t in self.threads:
+            t.join()
+
+        if self.error is not None:
+            raise self.error
+        return self.source_exhausted and not self.stop_event.is_set() and self.should_run()
+
+    def stop(self):
+        """请求停止（不等待线程退出）"""
+        self.stop_event.set()
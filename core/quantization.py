@@ -0,0 +1,155 @@
+#!/usr/bin/env python3
+import os
+import json
+import hashlib
+import cv2
+import numpy as np
+from core.evaluation import IMAGE_EXTS, load_sample_frames
+
+QUANT_MODES = ("dynamic", "static")
+
+def int8_cache_path(onnx_path, mode):
+    """INT8模型缓存路径：best.onnx → best.int8-dynamic.onnx / best.int8-static.onnx"""
+    return os.path.splitext(onnx_path)[0] + f".int8-{mode}.onnx"
+
+def calibration_record_path(int8_path):
+    """静态量化的校准记录：best.int8-static.onnx → best.int8-static.calib.json"""
+    return os.path.splitext(int8_path)[0] + ".calib.json"
+
+def calibration_signature(calibration_dir, calibration_frames, imgsz):
+    """
+    校准数据标识：目录、帧数上限、输入尺寸，以及实际参与校准的文件（名称/大小/修改时间）摘要；
+    任一变化都应重新量化（与 load_sample_frames 取同样的文件）
+    """
+    calibration_dir = os.path.abspath(calibration_dir)
+    names = sorted(n for n in os.listdir(calibration_dir) if n.lower().endswith(IMAGE_EXTS))[:calibration_frames]
+    digest = hashlib.sha1()
+    for name in names:
+        stat = os.stat(os.path.join(calibration_dir, name))
+        digest.update(f"{name}|{stat.st_size}|{int(stat.st_mtime)}\n".encode("utf-8"))
+    return {
+        "calibration_dir": calibration_dir,
+        "calibration_frames": int(calibration_frames),
+        "imgsz": int(imgsz),
+        "files_sha1": digest.hexdigest(),
+    }
+
+def _load_calibration_record(int8_path):
+    try:
+        with open(calibration_record_path(int8_path), "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+def letterbox_input(frame, imgsz):
+    """与ultralytics推理预处理一致：等比缩放+灰边(114)填充到 imgsz×imgsz，BGR→RGB，归一化为 1×3×H×W float32"""
+    h, w = frame.shape[:2]
+    scale = min(imgsz / h, imgsz / w)
+    new_w, new_h = int(round(w * scale)), int(round(h * scale))
+    resized = cv2.resize(frame, (new_w, new_h), interpolation=cv2.INTER_LINEAR)
+    canvas = np.full((imgsz, imgsz, 3), 114, dtype=np.uint8)
+    top, left = (imgsz - new_h) // 2, (imgsz - new_w) // 2
+    canvas[top:top + new_h, left:left + new_w] = resized
+    tensor = cv2.cvtColor(canvas, cv2.COLOR_BGR2RGB).transpose(2, 0, 1)[None].astype(np.float32) / 255.0
+    return np.ascontiguousarray(tensor)
+
+class FrameCalibrationReader:
+    """静态量化校准数据：逐帧提供预处理后的模型输入（onnxruntime CalibrationDataReader 接口）"""
+    def __init__(self, input_name, frames, imgsz):
+        self.input_name = input_name
+        self.frames = frames
+        self.imgsz = imgsz
+        self._iter = iter(frames)
+
+    def get_next(self):
+        frame = next(self._iter, None)
+        if frame is None:
+            return None
+        return {self.input_name: letterbox_input(frame, self.imgsz)}
+
+    def rewind(self):
+        self._iter = iter(self.frames)
+
+def _copy_metadata(src_path, dst_path):
+    """量化后保留导出时写入的元数据（类别名、任务、输入尺寸等），ultralytics加载时依赖"""
+    import onnx
+    src = onnx.load(src_path, load_external_data=False)
+    dst = onnx.load(dst_path)
+    existing = {p.key for p in dst.metadata_props}
+    for prop in src.metadata_props:
+        if prop.key not in existing:
+            dst.metadata_props.add(key=prop.key, value=prop.value)
+    onnx.save(dst, dst_path)
+
+def build_int8_model(onnx_path, mode="dynamic", calibration_dir=None, calibration_frames=64, imgsz=640, logger=print):
+    """
+    由float32 ONNX生成INT8模型并缓存（已有新鲜缓存时直接返回路径）：
+    - dynamic：权重INT8、激活运行时动态量化，无需校准数据
+    - static：权重与激活均INT8（QDQ格式），用校准目录中的样本帧统计激活范围；
+      校准目录/帧数/尺寸或校准文件变化时重新量化（未指定校准目录时沿用已有缓存）
+    """
+    from onnxruntime.quantization import QuantType, QuantFormat, quantize_dynamic, quantize_static
+
+    if mode not in QUANT_MODES:
+        raise ValueError(f"未知的量化模式：{mode}（可选：{', '.join(QUANT_MODES)}）")
+    out_path = int8_cache_path(onnx_path, mode)
+    signature = None
+    if mode == "static" and calibration_dir and os.path.isdir(calibration_dir):
+        signature = calibration_signature(calibration_dir, calibration_frames, imgsz)
+    if os.path.exists(out_path) and os.path.getmtime(out_path) >= os.path.getmtime(onnx_path):
+        if mode == "dynamic":
+            return out_path
+        record = _load_calibration_record(out_path)
+        if not calibration_dir and record is not None:
+            logger(f"ℹ️ 未指定校准目录，沿用已有INT8静态量化模型（校准于：{record.get('calibration_dir')}）")
+            return out_path
+        if signature is not None and record == signature:
+            return out_path
+        logger("ℹ️ 校准数据已变化，重新生成INT8静态量化模型")
+
+    # 量化前做形状推断/图优化，失败不影响后续量化
+    source_path = onnx_path
+    prepared_path = os.path.splitext(onnx_path)[0] + ".quant-pre.onnx"
+    try:
+        from onnxruntime.quantization.shape_inference import quant_pre_process
+        quant_pre_process(onnx_path, prepared_path, skip_symbolic_shape=True)
+        source_path = prepared_path
+    except Exception as e:
+        logger(f"ℹ️ 量化预处理跳过：{str(e)}")
+
+    try:
+        if mode == "dynamic":
+            logger(f"📦 正在生成INT8动态量化模型：{out_path}")
+            quantize_dynamic(source_path, out_path, weight_type=QuantType.QInt8)
+        else:
+            if not calibration_dir or not os.path.isdir(calibration_dir):
+                raise ValueError(f"静态量化需要校准样本目录（Config.QUANT_CALIBRATION_DIR）：{calibration_dir}")
+            frames = load_sample_frames(calibration_dir, calibration_frames)
+            if not frames:
+                raise ValueError(f"校准目录中没有可用图片：{calibration_dir}")
+            import onnxruntime as ort
+            session = ort.InferenceSession(onnx_path, providers=["CPUExecutionProvider"])
+            input_name = session.get_inputs()[0].name
+            del session
+            logger(f"📦 正在生成INT8静态量化模型（{len(frames)} 帧校准）：{out_path}")
+            quantize_static(
+                source_path, out_path, FrameCalibrationReader(input_name, frames, imgsz),
+                quant_format=QuantFormat.QDQ,
+                activation_type=QuantType.QUInt8,
+                weight_type=QuantType.QInt8,
+                per_channel=True
+            )
+    except Exception:
+        if os.path.exists(out_path):
+            os.remove(out_path)  # 不留下不完整的缓存
+        raise
+    finally:
+        if source_path == prepared_path and os.path.exists(prepared_path):
+            os.remove(prepared_path)
+
+    _copy_metadata(onnx_path, out_path)
+    if signature is not None:
+        with open(calibration_record_path(out_path), "w", encoding="utf-8") as f:
+            json.dump(signature, f, ensure_ascii=False, indent=2)
+    logger(f"✅ INT8模型已生成：{out_path}")
+    return out_path
@@ -0,0 +1,11 @@
+#!/usr/bin/env python3
+
+def render_annotated_frame(result, orig_frame, masks=True):
+    """由推理结果在内存中绘制标注帧（BGR）；多任务头结果依次叠加绘制，masks=False时跳过分割掩码；异常直接抛出由调用方处理"""
+    if isinstance(result, (list, tuple)):
+        annotated = orig_frame.copy()
+        for sub_result in result:
+            annotated = sub_result.plot(img=annotated, masks=masks)
+    else:
+        annotated = result.plot(masks=masks)
+    return annotated if annotated is not None else orig_frame
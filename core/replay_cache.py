@@ -0,0 +1,67 @@
+#!/usr/bin/env python3
+import cv2
+import numpy as np
+
+class ReplayCache:
+    """
+    预测结果回放缓存：推理时保存已渲染帧的预览尺寸副本（可选JPEG压缩），
+    推理完成后右侧循环回放直接读取内存，无需重新打开/解码输出视频
+    - 总字节数超过上限时放弃缓存（overflowed=True），回放退回磁盘读取
+    """
+    def __init__(self, max_bytes, preview_size, compress=True, jpeg_quality=85):
+        self.max_bytes = int(max_bytes)
+        self.preview_size = preview_size  # 预览区域(宽, 高)，帧等比缩小到其内
+        self.compress = compress
+        self.jpeg_quality = int(jpeg_quality)
+        self.frames = []
+        self.total_bytes = 0
+        self.overflowed = False
+
+    def _downscale(self, frame):
+        h, w = frame.shape[:2]
+        scale = min(self.preview_size[0] / w, self.preview_size[1] / h, 1.0)
+        if scale >= 1.0:
+            return frame
+        return cv2.resize(frame, (max(1, int(w * scale)), max(1, int(h * scale))), interpolation=cv2.INTER_AREA)
+
+    def add(self, frame):
+        """追加一帧（BGR），超出上限时清空并标记溢出，返回是否仍在缓存"""
+        if self.overflowed:
+            return False
+        small = self._downscale(frame)
+        if self.compress:
+            ok, encoded = cv2.imencode(".jpg", small, [cv2.IMWRITE_JPEG_QUALITY, self.jpeg_quality])
+            if not ok:
+                self.invalidate()
+                return False
+            item = encoded.tobytes()
+            size = len(item)
+        else:
+            item = small.copy() if small is frame else small
+            size = item.nbytes
+        if self.total_bytes + size > self.max_bytes:
+            self.invalidate()
+            return False
+        self.frames.append(item)
+        self.total_bytes += size
+        return True
+
+    def invalidate(self):
+        """放弃缓存（溢出或帧序列不完整），释放内存"""
+        self.overflowed = True
+        self.frames = []
+        self.total_bytes = 0
+
+    @property
+    def usable(self):
+        return not self.overflowed and len(self.frames) > 0
+
+    def __len__(self):
+        return len(self.frames)
+
+    def frame(self, index):
+        """取出第index帧（BGR）"""
+        item = self.frames[index]
+        if self.compress:
+            return cv2.imdecode(np.frombuffer(item, dtype=np.uint8), cv2.IMREAD_COLOR)
+        return item
@@ -0,0 +1,89 @@
+#!/usr/bin/env python3
+import os
+import threading
+from core.config import Config
+
+# 可单独设置CPU亲和性的线程角色（Config.CPU_AFFINITY 的键）
+THREAD_ROLES = ("decode", "infer", "render", "encode", "player", "replay", "capture")
+
+_applied = False
+_warned_affinity = False
+_lock = threading.Lock()
+
+def parse_cpu_list(spec):
+    """解析CPU列表：'0-3,6' → [0, 1, 2, 3, 6]；列表/元组原样转换"""
+    if spec is None or spec == "":
+        return []
+    if isinstance(spec, (list, tuple, set)):
+        return sorted({int(c) for c in spec})
+    cpus = set()
+    for part in str(spec).split(","):
+        part = part.strip()
+        if not part:
+            continue
+        if "-" in part:
+            lo, hi = part.split("-", 1)
+            cpus.update(range(int(lo), int(hi) + 1))
+        else:
+            cpus.add(int(part))
+    return sorted(cpus)
+
+def apply_runtime_config(logger=print, force=False):
+    """
+    按 Config 设置进程级线程池（进程内只需调用一次，模型加载/推理前调用）：
+    - TORCH_INTRA_OP_THREADS：torch算子内并行线程数（0=torch默认）
+    - TORCH_INTEROP_THREADS：torch算子间并行线程数（0=默认；只能在首次并行计算前设置一次）
+    - CV2_THREADS：OpenCV内部线程数（-1=默认，0/1=关闭内部并行）
+    返回实际生效的设置
+    """
+    global _applied
+    with _lock:
+        if _applied and not force:
+            return None
+        _applied = True
+    import cv2
+    import torch
+
+    if Config.TORCH_INTRA_OP_THREADS > 0:
+        torch.set_num_threads(int(Config.TORCH_INTRA_OP_THREADS))
+    if Config.TORCH_INTEROP_THREADS > 0:
+        try:
+            torch.set_num_interop_threads(int(Config.TORCH_INTEROP_THREADS))
+        except RuntimeError as e:
+            logger(f"⚠️ 无法设置torch算子间线程数（需在首次并行计算前设置）：{str(e)}")
+    if Config.CV2_THREADS >= 0:
+        cv2.setNumThreads(int(Config.CV2_THREADS))
+
+    applied = {
+        "torch_intra_op": torch.get_num_threads(),
+        "torch_interop": torch.get_num_interop_threads(),
+        "cv2": cv2.getNumThreads(),
+        "affinity": {role: parse_cpu_list(cpus) for role, cpus in (Config.CPU_AFFINITY or {}).items()},
+    }
+    logger(f"🧮 线程配置：torch算子内 {applied['torch_intra_op']}，算子间 {applied['torch_interop']}，OpenCV {applied['cv2']}"
+           + (f"，CPU亲和性 {applied['affinity']}" if applied["affinity"] else ""))
+    return applied
+
+def pin_current_thread(role, logger=print):
+    """
+    把调用线程绑定到 Config.CPU_AFFINITY[role] 指定的CPU（Linux按线程生效）；
+    未配置该角色或平台不支持时不做任何事，返回是否已绑定
+    """
+    affinity = Config.CPU_AFFINITY or {}
+    if role not in affinity:
+        return False
+    cpus = parse_cpu_list(affinity[role])
+    if not cpus:
+        return False
+    global _warned_affinity
+    if not hasattr(os, "sched_setaffinity"):
+        if not _warned_affinity:
+            _warned_affinity = True
+            logger("ℹ️ 当前平台不支持按线程设置CPU亲和性，已忽略 Config.CPU_AFFINITY")
+        return False
+    try:
+        os.sched_setaffinity(0, cpus)  # Linux下pid=0作用于调用线程
+        return True
+    except OSError as e:
+        logger(f"⚠️ 线程「{role}」绑定CPU {cpus} 失败：{str(e)}")
+        return False
@@ -0,0 +1,307 @@
+#!/usr/bin/env python3
+import os
+import json
+import queue
+import shutil
+import subprocess
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from core.config import Config
+from core.checkpoint import source_identity
+
+def plan_segments(total_frames, num_segments):
+    """将 [0, total_frames) 均分为连续的帧区间 [(起始帧, 结束帧)]，结束帧不含"""
+    num_segments = max(1, min(int(num_segments), int(total_frames)))
+    base, extra = divmod(int(total_frames), num_segments)
+    segments = []
+    start = 0
+    for i in range(num_segments):
+        end = start + base + (1 if i < extra else 0)
+        segments.append((start, end))
+        start = end
+    return segments
+
+# 精确定位失败时，先回退到目标帧之前这么多帧处重新定位（通常能落到前一个关键帧之后），再顺序解码到目标帧
+SEEK_BACKOFF_FRAMES = 250
+
+def seek_to_frame(cap, target):
+    """
+    帧精确定位：CAP_PROP_POS_FRAMES 对很多编码并不精确，设置后读回实际位置校验；
+    落点不对时回退到更早的位置（最终从第0帧）顺序 grab() 到目标帧。返回是否定位成功
+    """
+    import cv2
+    for seek_to in dict.fromkeys((target, max(0, target - SEEK_BACKOFF_FRAMES), 0)):
+        cap.set(cv2.CAP_PROP_POS_FRAMES, seek_to)
+        landed = int(round(cap.get(cv2.CAP_PROP_POS_FRAMES)))
+        if landed == target:
+            return True
+        if landed == seek_to and seek_to < target:
+            # 落点与请求一致且在目标之前：顺序解码（只grab不解码像素）到目标帧
+            return all(cap.grab() for _ in range(target - seek_to))
+    return False
+
+def _shard_worker(task):
+    """
+    子进程：独立加载模型，处理一个帧区间并写出分段视频
+    task为字典（需可pickle），返回 {"part_path", "frames", "ok", "error"}
+    非最后一段写出的帧数必须等于区间长度（最后一段允许因源视频提前结束而偏少），否则视为失败、不写续跑标记
+    """
+    import cv2
+    import torch
+    from core.backends import load_backend
+    from core.rendering import render_annotated_frame
+
+    # 每个进程限定线程数，避免多进程×多线程超订CPU
+    torch.set_num_threads(task["threads"])
+    cv2.setNumThreads(task["cv2_threads"])
+
+    part_path = task["part_path"]
+    processed = 0
+    cap = None
+    writer = None
+    try:
+        model = load_backend(task["backend"], task["weight_path"], logger=lambda msg: None)
+        cap = cv2.VideoCapture(task["video_path"])
+        if not cap.isOpened():
+            return {"part_path": part_path, "frames": 0, "ok": False, "error": "无法打开视频"}
+        if not seek_to_frame(cap, task["start"]):
+            return {"part_path": part_path, "frames": 0, "ok": False, "error": f"无法精确定位到第 {task['start']} 帧"}
+        writer = cv2.VideoWriter(part_path, cv2.VideoWriter_fourcc(*task["fourcc"]), task["fps"], task["frame_size"], isColor=True)
+        if not writer.isOpened():
+            return {"part_path": part_path, "frames": 0, "ok": False, "error": "分段视频写入器初始化失败"}
+
+        frame_index = task["start"]
+        while frame_index < task["end"] and not task["stop_event"].is_set():
+            frames = []
+            while len(frames) < task["batch_size"] and frame_index + len(frames) < task["end"]:
+                ret, frame = cap.read()
+                if not ret:
+                    break
+                frames.append(frame)
+            if not frames:
+                break
+
+            results = model.predict(
+                source=frames,
+                save=False,
+                device=task["device"],
+                imgsz=task["imgsz"],
+                conf=task["conf"],
+                mask_threshold=[0.4, 0.9],
+                verbose=False
+            )
+            for orig_frame, result in zip(frames, results):
+                pred_frame = render_annotated_frame(result, orig_frame)
+                if pred_frame.shape[1] != task["frame_size"][0] or pred_frame.shape[0] != task["frame_size"][1]:
+                    pred_frame = cv2.resize(pred_frame, task["frame_size"], interpolation=cv2.INTER_CUBIC)
+                writer.write(pred_frame)
+            frame_index += len(frames)
+            processed += len(frames)
+            task["progress_queue"].put((task["worker_id"], processed))
+
+            if len(frames) < task["batch_size"] and frame_index < task["end"]:
+                break  # 视频提前结束（帧数元数据偏大）
+
+        finished = not task["stop_event"].is_set()
+        expected = task["end"] - task["start"]
+        if finished and processed != expected and not task["is_last"]:
+            return {"part_path": part_path, "frames": processed, "ok": False,
+                    "error": f"分段帧数不符：写出 {processed} 帧，应为 {expected} 帧"}
+        if finished and task["done_marker"]:
+            # 续跑标记：分段写完后记录源视频标识与帧区间，重启时两者一致才跳过该分段
+            writer.release()
+            with open(task["done_marker"], "w", encoding="utf-8") as f:
+                json.dump({"source": task["source"], "start": task["start"], "end": task["end"]}, f, ensure_ascii=False)
+        return {"part_path": part_path, "frames": processed, "ok": finished, "error": "" if finished else "已停止"}
+    except Exception as e:
+        return {"part_path": part_path, "frames": processed, "ok": False, "error": str(e)}
+    finally:
+        if cap:
+            cap.release()
+        if writer:
+            writer.release()
+
+def concat_videos(part_paths, output_path, fps, frame_size, fourcc, logger):
+    """
+    按顺序合并分段视频：
+    1. 优先使用ffmpeg concat 流复制（-c copy，无损、不重新编码）
+    2. 无ffmpeg时回退为OpenCV逐帧重新编码（有损，记录提示）
+    """
+    ffmpeg = shutil.which("ffmpeg")
+    if ffmpeg:
+        list_path = output_path + ".parts.txt"
+        with open(list_path, "w", encoding="utf-8") as f:
+            for path in part_paths:
+                safe_path = os.path.abspath(path).replace("'", "'\\''")
+                f.write(f"file '{safe_path}'\n")
+        try:
+            proc = subprocess.run(
+                [ffmpeg, "-y", "-loglevel", "error", "-f", "concat", "-safe", "0", "-i", list_path, "-c", "copy", output_path],
+                capture_output=True, text=True
+            )
+            if proc.returncode == 0:
+                return True
+            logger(f"⚠️ ffmpeg无损合并失败，回退OpenCV重新编码：{proc.stderr.strip()}")
+        finally:
+            os.remove(list_path)
+    else:
+        logger("⚠️ 未找到ffmpeg，分段视频将使用OpenCV重新编码合并（非无损）")
+
+    import cv2
+    writer = cv2.VideoWriter(output_path, cv2.VideoWriter_fourcc(*fourcc), fps, frame_size, isColor=True)
+    if not writer.isOpened():
+        logger("❌ 合并视频写入器初始化失败")
+        return False
+    try:
+        for path in part_paths:
+            cap = cv2.VideoCapture(path)
+            while True:
+                ret, frame = cap.read()
+                if not ret:
+                    break
+                writer.write(frame)
+            cap.release()
+    finally:
+        writer.release()
+    return True
+
+class ShardedVideoJob:
+    """
+    进程分片视频推理：将视频按帧区间切分，每个子进程持有独立模型副本处理一段，
+    分段输出按顺序合并为最终视频；子进程线程数 = CPU核数 / 进程数，避免超订
+    """
+    def __init__(self, video_path, output_path, num_workers, logger, should_run=None, batch_size=1, resume=False):
+        self.video_path = video_path
+        self.output_path = output_path
+        self.num_workers = max(1, int(num_workers))
+        self.logger = logger
+        self.should_run = should_run or (lambda: True)
+        self.batch_size = max(1, int(batch_size))
+        self.resume = resume  # 续跑：跳过带完成标记且源视频、帧区间均一致的分段
+        self.total_processed = 0
+        self.source = None
+
+    @staticmethod
+    def _done_marker(part_path):
+        return part_path + ".done"
+
+    def _is_segment_done(self, part_path, start, end):
+        marker = self._done_marker(part_path)
+        if not (self.resume and os.path.exists(marker) and os.path.exists(part_path)):
+            return False
+        try:
+            with open(marker, "r", encoding="utf-8") as f:
+                record = json.load(f)
+        except (OSError, ValueError):
+            return False  # 旧格式或损坏的标记：重新处理该分段
+        return isinstance(record, dict) and record.get("source") == self.source \
+            and record.get("start") == start and record.get("end") == end
+
+    def _threads_per_worker(self):
+        if Config.SHARD_THREADS_PER_WORKER:
+            return max(1, int(Config.SHARD_THREADS_PER_WORKER))
+        return max(1, (os.cpu_count() or 1) // self.num_workers)
+
+    def _cv2_threads_per_worker(self):
+        """OpenCV线程数：Config.CV2_THREADS 为默认(-1)时每进程1线程；显式设置时按进程数均分（0=关闭内部并行）"""
+        if Config.CV2_THREADS < 0:
+            return 1
+        if Config.CV2_THREADS == 0:
+            return 0
+        return max(1, int(Config.CV2_THREADS) // self.num_workers)
+
+    def run(self, total_frames, fps, frame_size, device):
+        """阻塞执行分片推理+合并，返回True表示全部分段成功且已合并"""
+        segments = plan_segments(total_frames, self.num_workers)
+        self.source = source_identity(self.video_path, total_frames)
+        threads = self._threads_per_worker()
+        cv2_threads = self._cv2_threads_per_worker()
+        base, ext = os.path.splitext(self.output_path)
+        fourcc = "XVID" if ext.lower() == ".avi" else "mp4v"
+        part_paths = [f"{base}.part{i:03d}{ext}" for i in range(len(segments))]
+        self.logger(f"🧩 分片推理：{len(segments)} 个进程，每进程 {threads} 线程（OpenCV {cv2_threads}），共 {total_frames} 帧")
+
+        ctx = multiprocessing.get_context("spawn")
+        manager = ctx.Manager()
+        progress_queue = manager.Queue()
+        stop_event = manager.Event()
+        progress = [0] * len(segments)
+        results = []
+        pending = []
+        for i, (start, end) in enumerate(segments):
+            if self._is_segment_done(part_paths[i], start, end):
+                progress[i] = end - start
+                results.append({"part_path": part_paths[i], "frames": end - start, "ok": True, "error": ""})
+            else:
+                pending.append(i)
+        if len(pending) < len(segments):
+            self.logger(f"♻️ 续跑：跳过 {len(segments) - len(pending)} 个已完成分段")
+        try:
+            with ProcessPoolExecutor(max_workers=max(1, len(pending)), mp_context=ctx) as executor:
+                futures = [
+                    executor.submit(_shard_worker, {
+                        "worker_id": i,
+                        "video_path": self.video_path,
+                        "weight_path": Config.MODEL_WEIGHT_PATH,
+                        "backend": Config.INFERENCE_BACKEND,
+                        "start": start,
+                        "end": end,
+                        "part_path": part_paths[i],
+                        "fps": fps,
+                        "frame_size": frame_size,
+                        "fourcc": fourcc,
+                        "threads": threads,
+                        "cv2_threads": cv2_threads,
+                        "batch_size": self.batch_size,
+                        "device": device,
+                        "imgsz": Config.IMGSZ,
+                        "conf": Config.CONF_THRESHOLD,
+                        "progress_queue": progress_queue,
+                        "stop_event": stop_event,
+                        "done_marker": self._done_marker(part_paths[i]) if self.resume else "",
+                        "source": self.source,
+                        "is_last": i == len(segments) - 1,
+                    })
+                    for i, (start, end) in ((i, segments[i]) for i in pending)
+                ]
+                last_logged = 0
+                while not all(f.done() for f in futures):
+                    if not self.should_run():
+                        stop_event.set()
+                    try:
+                        worker_id, done = progress_queue.get(timeout=0.5)
+                        progress[worker_id] = done
+                    except queue.Empty:
+                        continue
+                    total_done = sum(progress)
+                    if total_done - last_logged >= 200:
+                        last_logged = total_done
+                        self.logger(f"✅ 分片推理进度：{total_done}/{total_frames} 帧")
+                results.extend(f.result() for f in futures)
+        finally:
+            manager.shutdown()
+
+        self.total_processed = sum(r["frames"] for r in results)
+        failed = [r for r in results if not r["ok"]]
+        if failed or not self.should_run():
+            for r in failed:
+                self.logger(f"❌ 分段 {os.path.basename(r['part_path'])} 未完成：{r['error']}")
+            return False
+
+        # 合并前校验：各分段按序首尾相接，写出总帧数应等于源视频帧数（仅最后一段可因元数据偏大而偏少）
+        results.sort(key=lambda r: part_paths.index(r["part_path"]))
+        for (start, end), r in zip(segments[:-1], results[:-1]):
+            if r["frames"] != end - start:
+                self.logger(f"❌ 分段 {os.path.basename(r['part_path'])} 帧数不符（{r['frames']}/{end - start}），不合并")
+                return False
+        if self.total_processed != total_frames:
+            self.logger(f"⚠️ 源视频实际可读 {self.total_processed} 帧，少于元数据帧数 {total_frames}（最后一段提前结束）")
+
+        ok = concat_videos(part_paths, self.output_path, fps, frame_size, fourcc, self.logger)
+        if ok:
+            for path in part_paths:
+                for leftover in (path, self._done_marker(path)):
+                    if os.path.exists(leftover):
+                        os.remove(leftover)
+            self.logger(f"✅ 分段视频已合并：{self.output_path}（共 {self.total_processed} 帧）")
+        return ok
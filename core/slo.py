@@ -0,0 +1,81 @@
+#!/usr/bin/env python3
+from collections import deque
+from core.latency import percentile
+
+class OperatingPoint:
+    """推理工作点：推理分辨率、跳帧数（每处理1帧跳过skip帧）、是否绘制分割掩码（多任务头输出）"""
+    __slots__ = ("imgsz", "skip", "masks")
+
+    def __init__(self, imgsz, skip=0, masks=True):
+        self.imgsz = int(imgsz)
+        self.skip = int(skip)
+        self.masks = bool(masks)
+
+    def describe(self):
+        return f"imgsz={self.imgsz} 跳帧={self.skip} 掩码={'开' if self.masks else '关'}"
+
+def build_ladder(imgsz_steps, max_skip):
+    """
+    由高到低构建降级阶梯：先逐级降分辨率，再关闭掩码绘制，最后逐级增加跳帧
+    例如 (640, 512, 384), max_skip=2 → 640 → 512 → 384 → 384无掩码 → 跳1帧 → 跳2帧
+    """
+    steps = sorted({int(s) for s in imgsz_steps}, reverse=True)
+    ladder = [OperatingPoint(s) for s in steps]
+    lowest = steps[-1]
+    ladder.append(OperatingPoint(lowest, 0, masks=False))
+    for skip in range(1, int(max_skip) + 1):
+        ladder.append(OperatingPoint(lowest, skip, masks=False))
+    return ladder
+
+class LatencySLOController:
+    """
+    延迟SLO自适应控制器（摄像头实时推理）：
+    1. 每处理一帧上报一次延迟（毫秒），按最近 window 帧的 p95 判断是否超出目标
+    2. p95 超过目标时降一级（降分辨率→关掩码→跳帧）；p95 低于 目标×headroom 且持续 2×window 帧时升一级
+    3. 每次切换后清空观测窗口（冷却），避免在两个工作点之间抖动；工作点变化时记录日志
+    """
+    def __init__(self, target_ms, imgsz_steps=(640, 512, 384), max_skip=2,
+                 window=15, headroom=0.7, logger=print):
+        self.target_ms = float(target_ms)
+        self.ladder = build_ladder(imgsz_steps, max_skip)
+        self.window = max(3, int(window))
+        self.headroom = float(headroom)
+        self.logger = logger
+        self.level = 0
+        self.changes = 0
+        self._samples = deque(maxlen=self.window)
+        self._good_frames = 0
+
+    @property
+    def point(self):
+        return self.ladder[self.level]
+
+    def reset(self):
+        self.level = 0
+        self.changes = 0
+        self._samples.clear()
+        self._good_frames = 0
+
+    def observe(self, latency_ms):
+        """上报一帧延迟，返回当前（可能已调整的）工作点"""
+        self._samples.append(float(latency_ms))
+        if len(self._samples) < self.window:
+            return self.point
+        p95 = percentile(sorted(self._samples), 95)
+        if p95 > self.target_ms and self.level < len(self.ladder) - 1:
+            self._switch(self.level + 1, p95)
+        elif p95 < self.target_ms * self.headroom and self.level > 0:
+            self._good_frames += 1
+            if self._good_frames >= self.window:
+                self._switch(self.level - 1, p95)
+        else:
+            self._good_frames = 0
+        return self.point
+
+    def _switch(self, level, p95):
+        direction = "降级" if level > self.level else "恢复"
+        self.level = level
+        self.changes += 1
+        self._samples.clear()
+        self._good_frames = 0
+        self.logger(f"🎛️ 延迟SLO{direction}：{self.point.describe()}（近期p95 {p95:.1f}ms / 目标 {self.target_ms:.0f}ms）")
@@ -0,0 +1,164 @@
+#!/usr/bin/env python3
+import json
+import time
+import threading
+from core.tracing import TRACER
+
+STAGES = ("decode", "preprocess", "inference", "postprocess", "render", "encode", "preview")
+
+# 直方图桶上界（毫秒），最后一个桶收集超出部分
+BUCKETS_MS = (0.1, 0.25, 0.5, 1, 2.5, 5, 10, 25, 50, 100, 250, 500, 1000, float("inf"))
+
+class _NullSpan:
+    """关闭计时时复用的空上下文：无分配、无计时"""
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+_NULL_SPAN = _NullSpan()
+
+class _Span:
+    __slots__ = ("timer", "stage", "count", "start")
+
+    def __init__(self, timer, stage, count):
+        self.timer = timer
+        self.stage = stage
+        self.count = count
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        end = time.perf_counter()
+        if self.timer.enabled:
+            self.timer.record(self.stage, (end - self.start) * 1000.0, self.count)
+        TRACER.complete(self.stage, self.start, end, "stage")
+        return False
+
+class StageHistogram:
+    """单阶段耗时聚合：次数/总和/最小/最大 + 对数刻度直方图（毫秒）"""
+    __slots__ = ("count", "total_ms", "min_ms", "max_ms", "buckets")
+
+    def __init__(self):
+        self.count = 0
+        self.total_ms = 0.0
+        self.min_ms = float("inf")
+        self.max_ms = 0.0
+        self.buckets = [0] * len(BUCKETS_MS)
+
+    def add(self, ms, count=1):
+        self.count += count
+        self.total_ms += ms * count
+        self.min_ms = min(self.min_ms, ms)
+        self.max_ms = max(self.max_ms, ms)
+        for i, upper in enumerate(BUCKETS_MS):
+            if ms <= upper:
+                self.buckets[i] += count
+                break
+
+    def to_dict(self):
+        return {
+            "count": self.count,
+            "total_ms": round(self.total_ms, 3),
+            "mean_ms": round(self.total_ms / self.count, 3) if self.count else None,
+            "min_ms": round(self.min_ms, 3) if self.count else None,
+            "max_ms": round(self.max_ms, 3),
+            "histogram": [
+                {"le_ms": "inf" if upper == float("inf") else upper, "count": n}
+                for upper, n in zip(BUCKETS_MS, self.buckets)
+            ],
+        }
+
+class StageTimer:
+    """
+    预测器分阶段计时（decode/preprocess/inference/postprocess/render/encode/preview）：
+    1. 关闭时 measure() 返回共享空上下文、record() 直接返回，开销可忽略（时间线追踪开启时 measure() 同时记录追踪事件）
+    2. 开启时按阶段聚合直方图；观察者 add_observer(callback(阶段, 毫秒, 帧数)) 可实时接收每次记录
+    3. 每次运行开始 reset()，结束 export() 导出本次运行的各阶段直方图
+    单次记录覆盖 count 帧时（如批量推理），按每帧平均耗时计入 count 次
+    """
+    def __init__(self, enabled=False, logger=print):
+        self.enabled = enabled
+        self.logger = logger
+        self._lock = threading.Lock()
+        self._observers = []
+        self._histograms = {}
+        self.started_at = time.time()
+
+    def reset(self):
+        with self._lock:
+            self._histograms = {}
+            self.started_at = time.time()
+
+    def add_observer(self, callback):
+        with self._lock:
+            if callback not in self._observers:
+                self._observers.append(callback)
+
+    def remove_observer(self, callback):
+        with self._lock:
+            if callback in self._observers:
+                self._observers.remove(callback)
+
+    def measure(self, stage, count=1):
+        """with timer.measure("render"): ... —— 计时代码块"""
+        if not self.enabled and not TRACER.enabled:
+            return _NULL_SPAN
+        return _Span(self, stage, count)
+
+    def record(self, stage, total_ms, count=1):
+        """记录一次耗时（毫秒，覆盖count帧）"""
+        if not self.enabled or count <= 0:
+            return
+        per_frame_ms = total_ms / count
+        with self._lock:
+            histogram = self._histograms.get(stage)
+            if histogram is None:
+                histogram = self._histograms[stage] = StageHistogram()
+            histogram.add(per_frame_ms, count)
+            observers = list(self._observers)
+        for callback in observers:
+            try:
+                callback(stage, per_frame_ms, count)
+            except Exception as e:
+                self.logger(f"⚠️ 阶段计时观察者异常：{str(e)}")
+
+    def record_ultralytics_speed(self, results):
+        """从 ultralytics Results.speed（每张图的预处理/推理/后处理毫秒）记录对应阶段"""
+        if not self.enabled:
+            return
+        for result in results:
+            # 多任务头结果共享同一次前向，只取第一个头的耗时
+            if isinstance(result, (list, tuple)):
+                result = result[0] if result else None
+            speed = getattr(result, "speed", None) or {}
+            for stage in ("preprocess", "inference", "postprocess"):
+                if speed.get(stage) is not None:
+                    self.record(stage, float(speed[stage]))
+
+    def summary(self):
+        """各阶段聚合结果（按STAGES顺序，其他自定义阶段附后）"""
+        with self._lock:
+            stages = {name: h.to_dict() for name, h in self._histograms.items()}
+        ordered = {name: stages.pop(name) for name in STAGES if name in stages}
+        ordered.update(stages)
+        return {"started_at": self.started_at, "stages": ordered}
+
+    def describe(self):
+        """单行文字摘要：各阶段每帧平均耗时"""
+        parts = [f"{name} {data['mean_ms']:.1f}ms" for name, data in self.summary()["stages"].items() if data["count"]]
+        return "，".join(parts) if parts else "无数据"
+
+    def export(self, path, extra=None):
+        """导出JSON（各阶段直方图），返回摘要字典"""
+        data = self.summary()
+        if extra:
+            data.update(extra)
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(data, f, ensure_ascii=False, indent=2)
+        return data
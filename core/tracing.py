@@ -0,0 +1,180 @@
+#!/usr/bin/env python3
+import os
+import json
+import time
+import atexit
+import threading
+from core.config import Config
+
+class _NullSpan:
+    """追踪关闭时复用的空上下文"""
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+_NULL_SPAN = _NullSpan()
+
+class _TraceSpan:
+    __slots__ = ("tracer", "name", "cat", "args", "start")
+
+    def __init__(self, tracer, name, cat, args):
+        self.tracer = tracer
+        self.name = name
+        self.cat = cat
+        self.args = args
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.tracer.complete(self.name, self.start, time.perf_counter(), self.cat, self.args)
+        return False
+
+class Tracer:
+    """
+    Trace Event Format（Chrome trace / Perfetto）记录器：
+    1. span() 记录完整事件（ph="X"），按线程分轨显示，线程名自动取自 threading 线程名
+    2. 事件缓存在内存（上限 max_events，超出后丢弃新事件并计数），save() 写出JSON，可在 ui.perfetto.dev 或 chrome://tracing 打开
+    3. 未启用时 span() 返回共享空上下文，开销可忽略
+    """
+    def __init__(self):
+        self.enabled = False
+        self.path = None
+        self.max_events = 0
+        self.dropped_events = 0
+        self._events = []
+        self._named_threads = set()
+        self._lock = threading.Lock()
+        self._origin = time.perf_counter()
+        self._pid = os.getpid()
+
+    def enable(self, path, max_events=1_000_000):
+        """开启追踪并在进程退出时自动保存"""
+        with self._lock:
+            if self.enabled:
+                self.path = path
+                return
+            self.enabled = True
+            self.path = path
+            self.max_events = int(max_events)
+            self._origin = time.perf_counter()
+        atexit.register(self.save)
+
+    def _us(self, t):
+        return round((t - self._origin) * 1_000_000, 1)
+
+    def _append(self, event):
+        """调用方已持有锁"""
+        tid = event["tid"]
+        if tid not in self._named_threads:
+            self._named_threads.add(tid)
+            self._events.append({
+                "ph": "M", "name": "thread_name", "pid": self._pid, "tid": tid,
+                "args": {"name": threading.current_thread().name},
+            })
+        if len(self._events) >= self.max_events:
+            self.dropped_events += 1
+            return
+        self._events.append(event)
+
+    def span(self, name, cat="stage", **args):
+        """with tracer.span("infer", cat="pipeline", frame=12): ... —— 记录当前线程上的一段耗时"""
+        if not self.enabled:
+            return _NULL_SPAN
+        return _TraceSpan(self, name, cat, args)
+
+    def complete(self, name, start, end, cat="stage", args=None):
+        """记录已知起止时间（perf_counter秒）的完整事件"""
+        if not self.enabled:
+            return
+        event = {
+            "ph": "X", "name": name, "cat": cat, "pid": self._pid, "tid": threading.get_ident(),
+            "ts": self._us(start), "dur": round((end - start) * 1_000_000, 1),
+        }
+        if args:
+            event["args"] = args
+        with self._lock:
+            self._append(event)
+
+    def instant(self, name, cat="event", **args):
+        """记录瞬时事件（ph="i"，如丢帧、工作点切换）"""
+        if not self.enabled:
+            return
+        event = {
+            "ph": "i", "s": "t", "name": name, "cat": cat, "pid": self._pid,
+            "tid": threading.get_ident(), "ts": self._us(time.perf_counter()),
+        }
+        if args:
+            event["args"] = args
+        with self._lock:
+            self._append(event)
+
+    def save(self, path=None):
+        """写出当前全部事件（覆盖写，可多次调用），返回路径"""
+        path = path or self.path
+        if not self.enabled or not path:
+            return None
+        with self._lock:
+            events = list(self._events)
+            dropped = self.dropped_events
+        data = {"traceEvents": events, "displayTimeUnit": "ms", "otherData": {"dropped_events": dropped}}
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(data, f)
+        os.replace(tmp_path, path)
+        return path
+
+class TracedLock:
+    """
+    可追踪的锁（接口同 threading.Lock）：记录等待锁（lock-wait）与持有锁（lock-hold）两段事件，
+    在时间线上可直接看到锁竞争导致的停顿
+    """
+    def __init__(self, name, tracer):
+        self.name = name
+        self.tracer = tracer
+        self._lock = threading.Lock()
+        self._acquired_at = {}
+
+    def acquire(self, blocking=True, timeout=-1):
+        wait_start = time.perf_counter()
+        acquired = self._lock.acquire(blocking, timeout)
+        now = time.perf_counter()
+        if acquired:
+            self._acquired_at[threading.get_ident()] = now
+        self.tracer.complete(f"wait {self.name}", wait_start, now, "lock", {"acquired": acquired})
+        return acquired
+
+    def release(self):
+        acquired_at = self._acquired_at.pop(threading.get_ident(), None)
+        self._lock.release()
+        if acquired_at is not None:
+            self.tracer.complete(f"hold {self.name}", acquired_at, time.perf_counter(), "lock")
+
+    def locked(self):
+        return self._lock.locked()
+
+    def __enter__(self):
+        self.acquire()
+        return self
+
+    def __exit__(self, *exc):
+        self.release()
+        return False
+
+TRACER = Tracer()
+
+def get_tracer():
+    """全局追踪器：Config.TRACE_PATH 设置后首次调用时启用"""
+    if Config.TRACE_PATH and not TRACER.enabled:
+        TRACER.enable(Config.TRACE_PATH, Config.TRACE_MAX_EVENTS)
+    return TRACER
+
+def traced_lock(name):
+    """创建锁：追踪开启时返回 TracedLock，否则返回普通 threading.Lock（无额外开销）"""
+    tracer = get_tracer()
+    return TracedLock(name, tracer) if tracer.enabled else threading.Lock()
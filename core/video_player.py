@@ -1,168 +1,192 @@
-#!/usr/bin/env python3
-import cv2
-import threading
-import time
-import queue
-from PIL import Image, ImageTk
-
-class IndependentVideoPlayer:
-    """独立原始视频播放器：GUI循环播放 + 和预测逻辑解耦"""
-    def __init__(self, preview_panel, logger):
-        self.preview_panel = preview_panel
-        self.logger = logger
-        self.cap = None
-        self.is_playing = False
-        self.is_paused = False
-        self.play_thread = None
-        self.frame_queue = queue.Queue(maxsize=5)
-        self.fps = 30
-        self.frame_delay = 33
-        self.lock = threading.Lock()
-        self.total_frames = 0
-        self.allow_loop = True  # 始终允许循环（GUI专用）
-
-    def load_video(self, video_path):
-        """加载视频并初始化参数"""
-        self.stop()  # 停止之前的播放
-        
-        self.total_frames = 0  # 初始化总帧数
-        with self.lock:
-            self.cap = cv2.VideoCapture(video_path)
-            if not self.cap or not self.cap.isOpened():
-                self.logger(f"❌ 无法打开视频：{video_path}")
-                return False
-            
-            # 获取视频原始参数（保证原速）
-            self.fps = int(self.cap.get(cv2.CAP_PROP_FPS)) if self.cap.get(cv2.CAP_PROP_FPS) > 0 else 30
-            self.frame_delay = int(1000 / self.fps)  # 每帧间隔毫秒数
-            self.total_frames = int(self.cap.get(cv2.CAP_PROP_FRAME_COUNT)) if self.cap.get(cv2.CAP_PROP_FRAME_COUNT) > 0 else 0
-            self.logger(f"📽️ 加载视频成功：帧率={self.fps}fps，总帧数={self.total_frames}")
-        
-        # 清空帧队列
-        while not self.frame_queue.empty():
-            try:
-                self.frame_queue.get_nowait()
-            except queue.Empty:
-                pass
-            
-        return True
-
-    def start_play(self):
-        """启动播放线程（GUI循环播放）"""
-        with self.lock:
-            if not self.cap or self.is_playing:
-                return
-            self.is_playing = True
-            self.is_paused = False
-        
-        self.play_thread = threading.Thread(target=self._play_loop, daemon=True)
-        self.play_thread.start()
-
-    def _play_loop(self):
-        """播放循环：GUI始终循环播放"""
-        while True:
-            with self.lock:
-                if not self.is_playing:
-                    break
-                if self.is_paused:
-                    time.sleep(0.01)
-                    continue
-        
-            start_time = time.time()
-        
-            # 读取帧
-            ret, frame = None, None
-            with self.lock:
-                if self.cap and self.cap.isOpened():
-                    ret, frame = self.cap.read()
-        
-            # GUI始终循环播放
-            if not ret:
-                with self.lock:
-                    self.cap.set(cv2.CAP_PROP_POS_FRAMES, 0)
-                    time.sleep(0.01)
-                    continue
-        
-            # 放入帧队列（供预览，非预测）
-            try:
-                if self.frame_queue.full():
-                    self.frame_queue.get_nowait()
-                self.frame_queue.put(frame.copy(), timeout=0.01)
-            except queue.Full:
-                pass
-        
-            # 更新左侧预览（循环显示）
-            self._safe_update_left_preview(frame)
-    
-            # 精准控制播放速度，避免跳帧
-            elapsed = int((time.time() - start_time) * 1000)
-            sleep_time = max(0, self.frame_delay - elapsed)
-            if sleep_time > 0:
-                time.sleep(sleep_time / 1000)
-
-    def _safe_update_left_preview(self, frame):
-        """更新左侧预览（循环显示）"""
-        try:
-            frame_rgb = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
-            img = Image.fromarray(frame_rgb)
-            img = self.preview_panel._resize_img_to_label(img, self.preview_panel.left_label)
-            img_tk = ImageTk.PhotoImage(img)
-            
-            def update_ui():
-                self.preview_panel.left_img = img_tk
-                self.preview_panel.left_label.config(image=img_tk, text="")
-            
-            if self.preview_panel and self.preview_panel.left_label:
-                self.preview_panel.left_label.after(0, update_ui)
-        except Exception as e:
-            self.logger(f"⚠️ 左侧预览更新失败：{str(e)}")
-
-    def get_latest_frame(self):
-        """获取最新帧（仅保留，供兼容）"""
-        try:
-            return self.frame_queue.get_nowait()
-        except queue.Empty:
-            return None
-
-    def pause(self):
-        """暂停播放"""
-        with self.lock:
-            self.is_paused = True
-
-    def resume(self):
-        """恢复播放"""
-        with self.lock:
-            self.is_paused = False
-
-    def stop(self):
-        """停止播放（和预测停止同步）"""
-        with self.lock:
-            self.is_playing = False
-            self.is_paused = False
-        
-        if self.play_thread and self.play_thread.is_alive():
-            self.play_thread.join(timeout=2)
-        
-        with self.lock:
-            if self.cap:
-                try:
-                    self.cap.release()
-                except Exception as e:
-                    self.logger(f"⚠️ 释放视频资源失败：{str(e)}")
-                self.cap = None
-        
-        # 清空队列
-        while not self.frame_queue.empty():
-            try:
-                self.frame_queue.get_nowait()
-            except queue.Empty:
-                pass
-        
-        # 清空预览
-        if self.preview_panel and self.preview_panel.left_label:
-            def clear_ui():
-                self.preview_panel.left_label.config(text="暂无原始内容", image="")
-                self.preview_panel.left_img = None
-            self.preview_panel.left_label.after(0, clear_ui)
-        
+#!/usr/bin/env python3
+import cv2
+import threading
+from core.pacing import FramePacer
+from core.tracing import TRACER, traced_lock
+from core.runtime import pin_current_thread
+
+class IndependentVideoPlayer:
+    """
+    独立原始视频播放器：GUI循环播放 + 和预测逻辑解耦
+    - 暂停/停止基于事件等待，暂停时不占用CPU
+    - 按单调时钟的绝对时间表出帧（支持29.97等非整数帧率，无累计漂移），迟到超过一帧时跳过显示
+    - 循环播放时重新打开视频从头解码，避免长GOP文件的定位开销
+    """
+    def __init__(self, preview_panel, logger):
+        self.preview_panel = preview_panel
+        self.logger = logger
+        self.cap = None
+        self.is_playing = False
+        self.is_paused = False
+        self.play_thread = None
+        self.shared_source = None  # 推理期间订阅的共享帧源（不自行解码）
+        self.fps = 30.0
+        self.video_path = ""
+        self.dropped_frames = 0  # 因迟到而跳过显示的帧数
+        self.lock = traced_lock("IndependentVideoPlayer.lock")  # Config.TRACE_PATH 设置时记录锁等待/持有
+        self._stop_event = threading.Event()
+        self._resume_event = threading.Event()  # 置位=播放中，清除=暂停
+        self._resume_event.set()
+        self.total_frames = 0
+        self.allow_loop = True  # 始终允许循环（GUI专用）
+
+    def load_video(self, video_path):
+        """加载视频并初始化参数"""
+        self.stop()  # 停止之前的播放
+        
+        self.total_frames = 0  # 初始化总帧数
+        with self.lock:
+            self.cap = cv2.VideoCapture(video_path)
+            if not self.cap or not self.cap.isOpened():
+                self.logger(f"❌ 无法打开视频：{video_path}")
+                return False
+            
+            # 获取视频原始参数（保证原速，保留小数帧率）
+            self.video_path = video_path
+            self.fps = self.cap.get(cv2.CAP_PROP_FPS) if self.cap.get(cv2.CAP_PROP_FPS) > 0 else 30.0
+            self.total_frames = int(self.cap.get(cv2.CAP_PROP_FRAME_COUNT)) if self.cap.get(cv2.CAP_PROP_FRAME_COUNT) > 0 else 0
+            self.logger(f"📽️ 加载视频成功：帧率={self.fps:.3f}fps，总帧数={self.total_frames}")
+            
+        return True
+
+    def attach_source(self, source):
+        """跟随共享帧源显示左侧预览：静默停止自身解码（不清空预览、不打印停止日志），仅显示帧源发布的帧（与推理帧一致）"""
+        self._halt()
+        with self.lock:
+            self.shared_source = source
+        source.subscribe(self._on_shared_frame)
+
+    def detach_source(self, source):
+        """取消跟随共享帧源"""
+        source.unsubscribe(self._on_shared_frame)
+        with self.lock:
+            if self.shared_source is source:
+                self.shared_source = None
+
+    def _on_shared_frame(self, frame_index, frame):
+        """共享帧源回调（运行在推理渲染线程）：暂停时不更新"""
+        if not self.is_paused:
+            self._safe_update_left_preview(frame)
+
+    def start_play(self):
+        """启动播放线程（GUI循环播放）"""
+        with self.lock:
+            if not self.cap or self.is_playing:
+                return
+            self.is_playing = True
+            self.is_paused = False
+        self._stop_event.clear()
+        self._resume_event.set()
+        
+        self.play_thread = threading.Thread(target=self._play_loop, name="left-player", daemon=True)
+        self.play_thread.start()
+
+    def _play_loop(self):
+        """播放循环：GUI始终循环播放；暂停时阻塞等待事件，按绝对时间表出帧，迟到则丢帧追赶"""
+        pin_current_thread("player")
+        pacer = FramePacer("target-fps", self.fps, catch_up=True)
+        while not self._stop_event.is_set():
+            if not self._resume_event.is_set():
+                self._resume_event.wait()
+                pacer.reset()  # 恢复后重新计时，避免把暂停时长当作迟到
+                continue
+        
+            # 等到本帧的计划时刻；迟到超过一帧则只grab不显示（不做颜色转换/预览）
+            lateness = pacer.wait()
+            drop = lateness > pacer.period
+        
+            ret, frame = False, None
+            with TRACER.span("player grab" if drop else "player decode", cat="player"), self.lock:
+                if self.cap and self.cap.isOpened():
+                    if drop:
+                        ret = self.cap.grab()
+                    else:
+                        ret, frame = self.cap.read()
+        
+            # GUI始终循环播放：到达末尾时重新打开文件从头解码（无需定位）
+            if not ret:
+                if not self._reopen_for_loop():
+                    break
+                pacer.reset()
+                continue
+        
+            if drop:
+                self.dropped_frames += 1
+                continue
+            # 更新左侧预览（循环显示）
+            self._safe_update_left_preview(frame)
+        
+        with self.lock:
+            self.is_playing = False
+
+    def _reopen_for_loop(self):
+        """循环播放：新开一个capture从头解码，替换旧capture（避免长GOP视频的CAP_PROP_POS_FRAMES定位）"""
+        if self._stop_event.is_set() or not self.video_path:
+            return False
+        new_cap = cv2.VideoCapture(self.video_path)
+        if not new_cap.isOpened():
+            self.logger(f"⚠️ 循环播放重新打开视频失败：{self.video_path}")
+            new_cap.release()
+            return False
+        with self.lock:
+            old_cap, self.cap = self.cap, new_cap
+        if old_cap:
+            old_cap.release()
+        return True
+
+    def _safe_update_left_preview(self, frame):
+        """更新左侧预览（循环显示）：提交到预览调度器，仅保留最新帧"""
+        try:
+            if self.preview_panel:
+                self.preview_panel.submit_frame(frame, "left")
+        except Exception as e:
+            self.logger(f"⚠️ 左侧预览更新失败：{str(e)}")
+
+    def pause(self):
+        """暂停播放（播放线程阻塞在事件上，不占用CPU）"""
+        with self.lock:
+            self.is_paused = True
+        self._resume_event.clear()
+
+    def resume(self):
+        """恢复播放"""
+        with self.lock:
+            self.is_paused = False
+        self._resume_event.set()
+
+    def _halt(self):
+        """结束解码线程、取消帧源订阅并释放capture（不清空预览、不打印停止日志）"""
+        with self.lock:
+            self.is_playing = False
+            self.is_paused = False
+            shared_source = self.shared_source
+        # 唤醒可能阻塞在暂停事件上的播放线程
+        self._stop_event.set()
+        self._resume_event.set()
+        if shared_source is not None:
+            self.detach_source(shared_source)
+        
+        if self.play_thread and self.play_thread.is_alive():
+            self.play_thread.join(timeout=2)
+        
+        with self.lock:
+            if self.cap:
+                try:
+                    self.cap.release()
+                except Exception as e:
+                    self.logger(f"⚠️ 释放视频资源失败：{str(e)}")
+                self.cap = None
+
+    def stop(self):
+        """停止播放（和预测停止同步）：结束解码并清空左侧预览"""
+        self._halt()
+        
+        # 清空预览（先丢弃尚未显示的帧，避免清空后被旧帧覆盖）
+        if self.preview_panel and self.preview_panel.left_label:
+            self.preview_panel.scheduler.discard("left")
+            def clear_ui():
+                self.preview_panel.left_label.config(text="暂无原始内容", image="")
+                self.preview_panel.left_img = None
+            self.preview_panel.left_label.after(0, clear_ui)
+        
         self.logger("🛑 GUI视频播放已停止")
\ No newline at end of file
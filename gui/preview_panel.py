@@ -1,84 +1,170 @@
-#!/usr/bin/env python3
-import tkinter as tk
-from tkinter import ttk
-from PIL import Image, ImageTk
-
-class PreviewPanel:
-    """分栏预览面板"""
-    def __init__(self, parent):
-        self.parent = parent
-        self.frame = ttk.LabelFrame(parent, text="预览区域")
-        self.frame.pack(fill=tk.BOTH, expand=True, padx=10, pady=5)
-        
-        # 分割面板
-        self.paned = ttk.PanedWindow(self.frame, orient=tk.HORIZONTAL)
-        self.paned.pack(fill=tk.BOTH, expand=True, padx=5, pady=5)
-        
-        # 左侧原始预览
-        self.left_frame = ttk.LabelFrame(self.paned, text="原始内容")
-        self.paned.add(self.left_frame, weight=1)
-        self.left_label = ttk.Label(self.left_frame, text="暂无原始内容", anchor="center")
-        self.left_label.pack(fill=tk.BOTH, expand=True)
-        
-        # 右侧预测结果预览
-        self.right_frame = ttk.LabelFrame(self.paned, text="预测结果")
-        self.paned.add(self.right_frame, weight=1)
-        self.right_label = ttk.Label(self.right_frame, text="暂无预测结果", anchor="center")
-        self.right_label.pack(fill=tk.BOTH, expand=True)
-        
-        # 缓存
-        self.left_img = None
-        self.right_img = None
-
-    def show_original_image(self, image_path):
-        """显示原始图片"""
-        try:
-            img = Image.open(image_path)
-            img = self._resize_img_to_label(img, self.left_label)
-            self.left_img = ImageTk.PhotoImage(img)
-            self.left_label.config(image=self.left_img, text="")
-        except Exception as e:
-            self.left_label.config(text=f"加载失败：{str(e)}", image="")
-
-    def show_result_image(self, image_path):
-        """显示预测结果图片"""
-        try:
-            img = Image.open(image_path)
-            img = self._resize_img_to_label(img, self.right_label)
-            self.right_img = ImageTk.PhotoImage(img)
-            self.right_label.config(image=self.right_img, text="")
-        except Exception as e:
-            self.right_label.config(text=f"加载失败：{str(e)}", image="")
-
-    def _resize_img_to_label(self, img, label):
-        """缩放图片到标签大小（优化鲁棒性，避免标签未渲染导致的尺寸异常）"""
-        # 优化：避免标签未完成渲染时，winfo_width()/winfo_height()返回0
-        label_w = label.winfo_width()
-        label_h = label.winfo_height()
-        
-        # 兜底尺寸：若标签未渲染完成，使用默认宽高
-        if label_w <= 1 or label_h <= 1:
-            label_w, label_h = 400, 300
-        
-        img_w, img_h = img.size
-        scale = min(label_w/img_w, label_h/img_h, 1.0)
-        new_w = int(img_w * scale)
-        new_h = int(img_h * scale)
-        
-        return img.resize((new_w, new_h), Image.Resampling.LANCZOS)
-
-    def clear(self):
-        """清空预览区域（增加鲁棒性，避免组件已销毁导致的报错）"""
-        try:
-            # 1. 先判断组件是否存在且未被销毁（winfo_exists()：返回1表示组件有效，0表示已销毁）
-            if hasattr(self, 'left_label') and self.left_label.winfo_exists():
-                self.left_label.config(text="暂无原始内容", image="")
-            if hasattr(self, 'right_label') and self.right_label.winfo_exists():
-                self.right_label.config(text="暂无预测结果", image="")
-        except tk.TclError:
-            # 2. 捕获Tkinter组件操作异常（兜底处理，避免程序崩溃）
-            pass
-        finally:
-            # 3. 无论是否报错，都清空图片缓存，释放内存
-            self.left_img = None
-            self.right_img = None
\ No newline at end of file
+#!/usr/bin/env python3
+import tkinter as tk
+from tkinter import ttk
+import cv2
+import numpy as np
+from PIL import Image, ImageTk
+from core.config import Config
+from gui.preview_scheduler import PreviewScheduler
+from gui.preview_surface import PhotoSurface
+
+DEFAULT_LABEL_SIZE = (400, 300)  # 标签尚未完成布局时的兜底尺寸
+
+def compute_preview_size(src_w, src_h, label_w, label_h):
+    """等比缩放到标签内（不放大），返回目标(宽, 高)"""
+    scale = min(label_w / src_w, label_h / src_h, 1.0)
+    return max(1, int(src_w * scale)), max(1, int(src_h * scale))
+
+def scale_frame(frame, target_size, quality="fast"):
+    """
+    缩放NumPy帧（BGR/灰度）：
+    - fast：cv2 INTER_AREA 直接在数组上缩放（缩小时质量好、速度快），先缩放再做颜色转换
+    - high：转PIL后 LANCZOS 缩放（与旧实现一致，画质最好、最慢）
+    """
+    if (frame.shape[1], frame.shape[0]) == target_size:
+        return frame
+    if quality == "high":
+        img = Image.fromarray(frame).resize(target_size, Image.Resampling.LANCZOS)
+        return np.asarray(img)
+    return cv2.resize(frame, target_size, interpolation=cv2.INTER_AREA)
+
+class PreviewPanel:
+    """分栏预览面板"""
+    def __init__(self, parent, logger=print):
+        self.parent = parent
+        self.logger = logger
+        self.frame = ttk.LabelFrame(parent, text="预览区域")
+        self.frame.pack(fill=tk.BOTH, expand=True, padx=10, pady=5)
+        
+        # 分割面板
+        self.paned = ttk.PanedWindow(self.frame, orient=tk.HORIZONTAL)
+        self.paned.pack(fill=tk.BOTH, expand=True, padx=5, pady=5)
+        
+        # 左侧原始预览
+        self.left_frame = ttk.LabelFrame(self.paned, text="原始内容")
+        self.paned.add(self.left_frame, weight=1)
+        self.left_label = ttk.Label(self.left_frame, text="暂无原始内容", anchor="center")
+        self.left_label.pack(fill=tk.BOTH, expand=True)
+        
+        # 右侧预测结果预览
+        self.right_frame = ttk.LabelFrame(self.paned, text="预测结果")
+        self.paned.add(self.right_frame, weight=1)
+        self.right_label = ttk.Label(self.right_frame, text="暂无预测结果", anchor="center")
+        self.right_label.pack(fill=tk.BOTH, expand=True)
+        
+        # 缓存
+        self.left_img = None
+        self.right_img = None
+
+        # 标签尺寸缓存：由<Configure>事件更新，渲染时不再调用winfo_width()/winfo_height()
+        self.quality = Config.PREVIEW_QUALITY
+        self._label_sizes = {"left": DEFAULT_LABEL_SIZE, "right": DEFAULT_LABEL_SIZE}
+        self._target_size_cache = {}  # (侧, 源宽, 源高) → 目标尺寸，标签尺寸变化时失效
+        self.left_label.bind("<Configure>", lambda e: self._on_label_configure("left", e))
+        self.right_label.bind("<Configure>", lambda e: self._on_label_configure("right", e))
+
+        # 视频/摄像头帧预览画布：每侧复用一个PhotoImage，尺寸变化才重新分配
+        self.surfaces = {"left": PhotoSurface(self.left_label), "right": PhotoSurface(self.right_label)}
+
+        # 视频/摄像头帧预览调度：各侧仅保留最新帧，按最大刷新频率在主线程渲染
+        self.scheduler = PreviewScheduler(self.frame, self._render_frame, Config.PREVIEW_MAX_HZ, logger)
+        self.scheduler.start()
+        self.stage_timer = None  # 当前预测器的分阶段计时器（由预测器设置）
+
+    def submit_frame(self, frame, side, on_display=None):
+        """提交BGR/灰度帧到预览（任意线程可调用，旧帧未显示时被覆盖丢弃）；on_display(上屏时间或None)用于延迟统计"""
+        self.scheduler.submit(side, frame, on_display)
+
+    def label_size(self, side):
+        """当前缓存的标签尺寸(宽, 高)"""
+        return self._label_sizes[side]
+
+    def set_quality(self, quality):
+        """设置预览缩放质量：fast（INTER_AREA）/ high（LANCZOS）"""
+        if quality in ("fast", "high"):
+            self.quality = quality
+
+    def _on_label_configure(self, side, event):
+        """标签尺寸变化：更新缓存尺寸并使目标尺寸缓存失效"""
+        if event.width <= 1 or event.height <= 1:
+            return
+        size = (event.width, event.height)
+        if self._label_sizes[side] != size:
+            self._label_sizes[side] = size
+            self._target_size_cache = {k: v for k, v in self._target_size_cache.items() if k[0] != side}
+
+    def _target_size(self, side, src_w, src_h):
+        key = (side, src_w, src_h)
+        size = self._target_size_cache.get(key)
+        if size is None:
+            size = compute_preview_size(src_w, src_h, *self._label_sizes[side])
+            self._target_size_cache[key] = size
+        return size
+
+    def _render_frame(self, side, frame):
+        """主线程渲染一帧（设置了stage_timer时计入preview阶段耗时）"""
+        if self.stage_timer is None:
+            self._draw_frame(side, frame)
+            return
+        with self.stage_timer.measure("preview"):
+            self._draw_frame(side, frame)
+
+    def _draw_frame(self, side, frame):
+        """在数组上缩放到缓存的目标尺寸→原地写入该侧PhotoImage；仅图片对象变化时才重新绑定标签"""
+        label = self.left_label if side == "left" else self.right_label
+        frame = scale_frame(frame, self._target_size(side, frame.shape[1], frame.shape[0]), self.quality)
+        surface = self.surfaces[side]
+        surface.update(frame)
+        current_img = self.left_img if side == "left" else self.right_img
+        if current_img is not surface.photo:
+            # 首帧、尺寸变化或被清空/静态图片替换后，重新绑定（保留引用避免垃圾回收）
+            if side == "left":
+                self.left_img = surface.photo
+            else:
+                self.right_img = surface.photo
+            label.config(image=surface.photo, text="")
+
+    def show_original_image(self, image_path):
+        """显示原始图片"""
+        try:
+            img = Image.open(image_path)
+            img = self._resize_img_to_label(img, self.left_label)
+            self.left_img = ImageTk.PhotoImage(img)
+            self.left_label.config(image=self.left_img, text="")
+        except Exception as e:
+            self.left_label.config(text=f"加载失败：{str(e)}", image="")
+
+    def show_result_image(self, image_path):
+        """显示预测结果图片"""
+        try:
+            img = Image.open(image_path)
+            img = self._resize_img_to_label(img, self.right_label)
+            self.right_img = ImageTk.PhotoImage(img)
+            self.right_label.config(image=self.right_img, text="")
+        except Exception as e:
+            self.right_label.config(text=f"加载失败：{str(e)}", image="")
+
+    def _resize_img_to_label(self, img, label):
+        """缩放PIL图片到标签大小（静态图片使用，尺寸取自<Configure>缓存，标签未渲染时使用兜底尺寸）"""
+        side = "left" if label is self.left_label else "right"
+        new_size = compute_preview_size(*img.size, *self._label_sizes[side])
+        return img.resize(new_size, Image.Resampling.LANCZOS)
+
+    def clear(self):
+        """清空预览区域（增加鲁棒性，避免组件已销毁导致的报错）"""
+        self.scheduler.discard()
+        try:
+            # 1. 先判断组件是否存在且未被销毁（winfo_exists()：返回1表示组件有效，0表示已销毁）
+            if hasattr(self, 'left_label') and self.left_label.winfo_exists():
+                self.left_label.config(text="暂无原始内容", image="")
+            if hasattr(self, 'right_label') and self.right_label.winfo_exists():
+                self.right_label.config(text="暂无预测结果", image="")
+        except tk.TclError:
+            # 2. 捕获Tkinter组件操作异常（兜底处理，避免程序崩溃）
+            pass
+        finally:
+            # 3. 无论是否报错，都清空图片缓存，释放内存
+            self.left_img = None
+            self.right_img = None
+            for surface in self.surfaces.values():
+                surface.reset()
\ No newline at end of file
@@ -0,0 +1,129 @@
+#!/usr/bin/env python3
+import time
+import threading
+import tkinter as tk
+from core.tracing import TRACER
+
+class PreviewScheduler:
+    """
+    预览调度器（最新帧优先）：
+    1. 任意线程调用 submit() 只替换对应侧的待显示帧（按引用保存，不复制、不转换），耗时可忽略
+    2. Tk主线程按不超过 max_hz 的频率取出各侧最新帧并渲染，未来得及显示的旧帧直接丢弃
+    3. 渲染回调不会在Tk事件队列中堆积，预览开销与推理速度无关；没有待显示帧时不注册定时器（空闲无唤醒）
+    4. 可选 on_display 回调：帧写入预览后以 time.perf_counter() 调用，被覆盖/丢弃时以 None 调用（用于延迟统计）
+    """
+    SIDES = ("left", "right")
+
+    def __init__(self, widget, render_func, max_hz=30, logger=print):
+        """
+        :param widget: 用于注册after定时器的Tk组件
+        :param render_func: Tk主线程中执行的渲染函数 render_func(side, frame)
+        :param max_hz: 最大预览刷新频率
+        :param logger: 渲染/回调异常的日志输出
+        """
+        self.widget = widget
+        self.render_func = render_func
+        self.logger = logger
+        self.interval = 1.0 / max(1, max_hz)
+        self._lock = threading.Lock()
+        self._pending = {side: None for side in self.SIDES}  # 各侧待显示的 (帧, on_display)
+        self.dropped = {side: 0 for side in self.SIDES}  # 被更新帧覆盖而未显示的帧数
+        self._running = False
+        self._armed = False  # 是否已注册一次渲染回调（有待显示帧时才注册）
+        self._after_id = None
+        self._last_render = 0.0
+
+    def start(self):
+        with self._lock:
+            self._running = True
+            arm = not self._armed and any(self._pending.values())
+            if arm:
+                self._armed = True
+        if arm:
+            self._arm()
+
+    def stop(self):
+        with self._lock:
+            self._running = False
+            self._armed = False
+            after_id, self._after_id = self._after_id, None
+        if after_id is not None:
+            try:
+                self.widget.after_cancel(after_id)
+            except tk.TclError:
+                pass
+
+    def _arm(self):
+        """注册下一次渲染：距上次渲染不足一个刷新间隔时延后到间隔末尾（限频）"""
+        delay_ms = max(1, int((self.interval - (time.perf_counter() - self._last_render)) * 1000))
+        try:
+            self._after_id = self.widget.after(delay_ms, self._tick)
+        except (tk.TclError, RuntimeError):
+            # 组件已销毁或Tk主循环已退出（窗口关闭）
+            with self._lock:
+                self._armed = False
+
+    def submit(self, side, frame, on_display=None):
+        """提交待显示帧（线程安全），覆盖尚未显示的旧帧；当前没有已注册的渲染时注册一次"""
+        with self._lock:
+            replaced = self._pending[side]
+            if replaced is not None:
+                self.dropped[side] += 1
+            self._pending[side] = (frame, on_display)
+            arm = self._running and not self._armed
+            if arm:
+                self._armed = True
+        self._notify(replaced, None)
+        if arm:
+            self._arm()
+
+    def discard(self, side=None):
+        """丢弃待显示帧（清空预览前调用，避免旧帧在清空后重新显示）"""
+        with self._lock:
+            discarded = []
+            for s in (self.SIDES if side is None else (side,)):
+                discarded.append(self._pending[s])
+                self._pending[s] = None
+        for item in discarded:
+            self._notify(item, None)
+
+    def _notify(self, item, timestamp):
+        if item is None or item[1] is None:
+            return
+        try:
+            item[1](timestamp)
+        except Exception as e:
+            self.logger(f"⚠️ 预览显示回调失败：{str(e)}")
+
+    def _tick(self):
+        """Tk主线程回调：渲染各侧最新帧；渲染期间到达的新帧会重新注册下一次回调"""
+        with self._lock:
+            frames = dict(self._pending)
+            self._pending = {side: None for side in self.SIDES}
+            self._armed = False
+            self._after_id = None
+        self._last_render = time.perf_counter()
+        try:
+            if TRACER.enabled and any(frames.values()):
+                with TRACER.span("preview tick", cat="tk"):
+                    self._render_pending(frames)
+            else:
+                self._render_pending(frames)
+        except tk.TclError:
+            # 组件已销毁（窗口关闭），停止调度
+            self.stop()
+
+    def _render_pending(self, frames):
+        for side, item in frames.items():
+            if item is None:
+                continue
+            try:
+                self.render_func(side, item[0])
+            except tk.TclError:
+                self._notify(item, None)
+                raise
+            except Exception as e:
+                self.logger(f"⚠️ {side}侧预览渲染失败：{str(e)}")
+                self._notify(item, None)
+                continue
+            self._notify(item, time.perf_counter())
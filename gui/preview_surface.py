@@ -0,0 +1,43 @@
+#!/usr/bin/env python3
+import cv2
+import numpy as np
+from PIL import Image, ImageTk
+
+class PhotoSurface:
+    """
+    单侧预览画布：复用同一个 ImageTk.PhotoImage，原地更新像素
+    1. 预分配RGBA缓冲，并用 Image.frombuffer 建立与之共享内存的PIL图片（不复制）
+    2. 每帧 cv2.cvtColor 直接写入该缓冲，再 paste() 到已有的Tk图片：Pillow在C层把像素整理为连续块后
+       直接写入Tk照片块，不产生Python bytes对象，也没有PPM编码与Tcl解析
+    3. 仅当帧尺寸（即标签尺寸）变化时重新分配 PhotoImage 与缓冲
+    """
+    def __init__(self, master):
+        self.master = master
+        self.photo = None
+        self.size = None
+        self._rgba = None  # 预分配的RGBA像素缓冲，cvtColor的输出
+        self._image = None  # 与_rgba共享内存的PIL图片
+
+    def _allocate(self, width, height):
+        self._rgba = np.empty((height, width, 4), dtype=np.uint8)
+        self._image = Image.frombuffer("RGBA", (width, height), self._rgba, "raw", "RGBA", 0, 1)
+        self.photo = ImageTk.PhotoImage("RGBA", (width, height), master=self.master, width=width, height=height)
+        self.size = (width, height)
+
+    def update(self, frame):
+        """写入一帧BGR/灰度图（尺寸应已缩放到预览大小），返回是否重新分配了PhotoImage"""
+        height, width = frame.shape[:2]
+        reallocated = self.size != (width, height)
+        if reallocated:
+            self._allocate(width, height)
+        code = cv2.COLOR_GRAY2RGBA if frame.ndim == 2 else cv2.COLOR_BGR2RGBA
+        cv2.cvtColor(frame, code, dst=self._rgba)
+        self.photo.paste(self._image)
+        return reallocated
+
+    def reset(self):
+        """释放PhotoImage（清空预览后调用）"""
+        self.photo = None
+        self.size = None
+        self._rgba = None
+        self._image = None
@@ -1,5 +1,7 @@
-#!/usr/bin/env python3
-from gui.main_app import main
-
-if __name__ == "__main__":
+#!/usr/bin/env python3
+import multiprocessing
+from gui.main_app import main
+
+if __name__ == "__main__":
+    multiprocessing.freeze_support()  # 打包EXE下分片推理子进程需要
     main()
\ No newline at end of file